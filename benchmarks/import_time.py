@@ -0,0 +1,110 @@
+"""Import-time profile of the Streamlit entry point and each tab.
+
+Every target is imported in a fresh interpreter with ``-X importtime`` so the
+numbers reflect a cold start. Run from the repository root:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --json > import_times.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# main is what every page pays; each tab is what its page adds on first use
+TARGETS = [
+    "main",
+    "ui.tabs.about_tab",
+    "ui.tabs.threat_model_tab",
+    "ui.tabs.attack_tree_tab",
+    "ui.tabs.mitigations_tab",
+    "ui.tabs.dread_tab",
+    "ui.tabs.test_cases_tab",
+    "ui.tabs.copilot_tab",
+    "ui.tabs.rfps_tab",
+    "src.db_ops",
+    "src.query_data",
+]
+
+
+# Function to parse -X importtime output into (module, self_us, cumulative_us)
+# entries in the order the imports finished
+def parse_importtime(stderr):
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        entries.append((module.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def profile_import(module, baseline=("streamlit",)):
+    # Streamlit is already loaded on every page, so it is imported first and
+    # the target's cumulative time only counts what the target adds
+    code = "".join(f"import {name};" for name in baseline) + f"import {module}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1]
+        return {"module": module, "error": error}
+
+    entries = parse_importtime(result.stderr)
+    # Skip interpreter startup and the baseline; the target's own imports
+    # are everything reported after them
+    baseline_end = max(
+        (index for index, entry in enumerate(entries) if entry[0] in baseline),
+        default=-1,
+    )
+    entries = entries[baseline_end + 1 :]
+    cumulative_us = next((c for name, _s, c in entries if name == module), 0)
+    # Top-level packages only, so nested submodules are not double counted
+    dependencies = sorted(
+        (
+            (name, cumulative)
+            for name, _self, cumulative in entries
+            if "." not in name and name != module
+        ),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    return {
+        "module": module,
+        "cumulative_ms": round(cumulative_us / 1000, 1),
+        "slowest": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1)}
+            for name, cumulative in dependencies[:10]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=TARGETS)
+    parser.add_argument("--json", action="store_true", help="Print JSON results")
+    args = parser.parse_args()
+
+    results = [profile_import(target) for target in args.targets]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for result in results:
+        if "error" in result:
+            print(f"{result['module']:<32} failed: {result['error']}")
+            continue
+        print(f"{result['module']:<32} {result['cumulative_ms']:>8.1f} ms")
+        for entry in result["slowest"][:5]:
+            print(f"    {entry['module']:<40} {entry['cumulative_ms']:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
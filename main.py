@@ -1,18 +1,31 @@
-import streamlit as st
+import importlib
 
-from ui.tabs.threat_model_tab import threat_model_tab
-from ui.tabs.attack_tree_tab import attack_tree_tab
-from ui.tabs.mitigations_tab import mitigations_tab
-from ui.tabs.dread_tab import dread_tab
-from ui.tabs.test_cases_tab import test_cases_tab
-from ui.tabs.copilot_tab import copilot_tab
-from ui.tabs.about_tab import about_tab
-from ui.tabs.rfps_tab import rfps_tab
-# from ui.tabs.library_tab import library_tab
+import streamlit as st
 
 from ui.sidebar import create_sidebar
 from src.utils import update_st_session_data
 
+# Tabs are imported on first use so a page only pays for its own dependencies
+# (LangChain, Chroma, the OpenAI SDK, ...) instead of every page's at startup
+TABS = {
+    "threat_model": "ui.tabs.threat_model_tab",
+    "attack_tree": "ui.tabs.attack_tree_tab",
+    "mitigations": "ui.tabs.mitigations_tab",
+    "dread": "ui.tabs.dread_tab",
+    "test_cases": "ui.tabs.test_cases_tab",
+    "copilot": "ui.tabs.copilot_tab",
+    "about": "ui.tabs.about_tab",
+    "rfps": "ui.tabs.rfps_tab",
+    # "library": "ui.tabs.library_tab",
+}
+
+
+# Function to import a tab module on demand and render it. Python caches the
+# module after the first import, so later reruns only pay for the call.
+def render_tab(name):
+    module = importlib.import_module(TABS[name])
+    getattr(module, f"{name}_tab")()
+
 
 # Function to get user input for the application description and key details
 def get_input():
@@ -39,30 +52,30 @@ def main():
     # print(session_data)
 
     if selected == "RFPs":
-        rfps_tab()
+        render_tab("rfps")
 
     elif selected == "Threat Model":
         tab1, tab2, tab3, tab4, tab5 = st.tabs(
             ["Threat Model", "Attack Tree", "Mitigations", "DREAD", "Test Cases"]
         )
         with tab1:
-            threat_model_tab()
+            render_tab("threat_model")
         with tab2:
-            attack_tree_tab()
+            render_tab("attack_tree")
         with tab3:
-            mitigations_tab()
+            render_tab("mitigations")
         with tab4:
-            dread_tab()
+            render_tab("dread")
         with tab5:
-            test_cases_tab()
+            render_tab("test_cases")
 
     # elif selected == "Library":
-    #     library_tab()
+    #     render_tab("library")
 
     elif selected == "About":
-        about_tab()
+        render_tab("about")
     elif selected == "Copilot":
-        copilot_tab()
+        render_tab("copilot")
 
     else:
         st.title(f"{selected} Page")
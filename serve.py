@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.warmup import READY, start_warm_up, warmup_state
+
+STREAMLIT_PORT = int(os.getenv("STREAMLIT_PORT", 8501))
+READINESS_PORT = int(os.getenv("READINESS_PORT", 8502))
+
+
+def _streamlit_listening():
+    try:
+        with socket.create_connection(("127.0.0.1", STREAMLIT_PORT), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+# /healthz answers as soon as the process is up; /readyz only once warm-up
+# has finished and Streamlit is accepting connections
+class ProbeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/healthz":
+            self._respond(200, {"status": "up"})
+        elif self.path == "/readyz":
+            state = warmup_state()
+            state["streamlit"] = _streamlit_listening()
+            ready = state["status"] == READY and state["streamlit"]
+            self._respond(200 if ready else 503, state)
+        else:
+            self._respond(404, {"error": "not found"})
+
+    def _respond(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Probes arrive every few seconds; keep them out of the app logs
+        pass
+
+
+def start_probe_server(port=READINESS_PORT):
+    server = ThreadingHTTPServer(("0.0.0.0", port), ProbeHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, name="probe-server", daemon=True
+    )
+    thread.start()
+    return server
+
+
+# Launches Streamlit in this process after starting the probe server and the
+# warm-up thread. Streamlit runs main.py in the same interpreter, so modules,
+# the Chroma handle and provider clients loaded during warm-up are reused by
+# the first session. Extra arguments are passed through to `streamlit run`.
+def main():
+    logging.basicConfig(level=logging.INFO)
+    start_probe_server()
+    start_warm_up()
+
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run", "main.py", *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import asyncio
+import atexit
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from services.dynamodb_service import BATCH_WRITE_SIZE, DynamoDBService
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_WORKERS = 4
+# Flushes a throttled write may sit out before it is given up on
+MAX_REQUEUES = 5
+DEAD_LETTER_LIMIT = 1000
+
+
+# Non-blocking counterpart to DynamoDBService. Reads and updates run on a
+# small thread pool and are awaited from asyncio; puts and deletes are
+# buffered and written behind in BatchWriteItem calls by a background
+# flusher, so callers never wait on DynamoDB to persist a result. Buffered
+# writes are flushed on close() and at interpreter exit. Writes DynamoDB
+# rejects, and writes still throttled after MAX_REQUEUES flushes, are logged
+# and kept in dead_letters instead of being retried forever.
+class AsyncDynamoDBService:
+    def __init__(
+        self,
+        config,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        self.service = DynamoDBService(config)
+        # Buffered writes are keyed on the table's key attributes so a later
+        # write to the same item replaces the earlier one
+        self.key_attributes = config.get("DYNAMODB_KEY_ATTRIBUTES", ["UID"])
+        self.flush_interval = flush_interval
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="dynamodb"
+        )
+        self._buffer = {}
+        # Operations handed to the current batch write, still visible to reads
+        self._in_flight = {}
+        # Times each buffered write has been put back after a failed flush
+        self._requeues = {}
+        self.dead_letters = deque(maxlen=DEAD_LETTER_LIMIT)
+        self._buffer_lock = threading.Condition()
+        # Held while a batch is being written so flush() waits for it
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="dynamodb-flusher", daemon=True
+        )
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _buffer_key(self, key_or_item):
+        return tuple(key_or_item[name] for name in self.key_attributes)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: func(*args, **kwargs)
+        )
+
+    # Write-behind operations. These return immediately; the flusher writes
+    # the buffer every flush_interval or as soon as a full batch is waiting.
+    def put_item_nowait(self, item):
+        self._enqueue(self._buffer_key(item), ("put", item))
+
+    def delete_item_nowait(self, key):
+        self._enqueue(self._buffer_key(key), ("delete", key))
+
+    def _enqueue(self, buffer_key, operation):
+        with self._buffer_lock:
+            if self._closed:
+                raise RuntimeError("AsyncDynamoDBService is closed")
+            self._buffer[buffer_key] = operation
+            self._requeues.pop(buffer_key, None)
+            if len(self._buffer) >= BATCH_WRITE_SIZE:
+                self._buffer_lock.notify()
+
+    async def put_item(self, item):
+        self.put_item_nowait(item)
+
+    async def add_uid(self, uid):
+        self.put_item_nowait({"UID": uid})
+
+    async def delete_item(self, key):
+        self.delete_item_nowait(key)
+
+    # Reads see buffered writes first so callers can read their own writes
+    async def get_item(
+        self, key, projection_expression=None, expression_attribute_names=None
+    ):
+        buffer_key = self._buffer_key(key)
+        with self._buffer_lock:
+            buffered = self._buffer.get(buffer_key) or self._in_flight.get(buffer_key)
+        if buffered is not None:
+            action, value = buffered
+            return value if action == "put" else None
+        return await self._run(
+            self.service.get_item,
+            key,
+            projection_expression=projection_expression,
+            expression_attribute_names=expression_attribute_names,
+        )
+
+    async def get_uid(self, uid):
+        return await self.get_item({"UID": uid})
+
+    async def update_item(
+        self, key, update_expression, expression_attribute_values, **kwargs
+    ):
+        # An update must land after any buffered write to the same item
+        buffer_key = self._buffer_key(key)
+        with self._buffer_lock:
+            pending = buffer_key in self._buffer or buffer_key in self._in_flight
+        if pending:
+            await self._run(self.flush)
+        return await self._run(
+            self.service.update_item,
+            key,
+            update_expression,
+            expression_attribute_values,
+            **kwargs,
+        )
+
+    async def batch_get(self, keys, **kwargs):
+        await self._run(self.flush)
+        return await self._run(self.service.batch_get, keys, **kwargs)
+
+    def _flush_loop(self):
+        while True:
+            with self._buffer_lock:
+                if not self._closed and len(self._buffer) < BATCH_WRITE_SIZE:
+                    self._buffer_lock.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error flushing DynamoDB writes: {str(e)}")
+
+    def flush(self):
+        with self._flush_lock:
+            with self._buffer_lock:
+                operations, self._buffer = self._buffer, {}
+                self._in_flight = operations
+            if not operations:
+                return
+            items, keys = [], []
+            for action, value in operations.values():
+                (items if action == "put" else keys).append(value)
+            rejected = []
+            try:
+                unprocessed = self.service.batch_write(
+                    items=items, delete_keys=keys, rejected=rejected
+                )
+            except Exception:
+                self._requeue_operations(operations.values())
+                raise
+            finally:
+                with self._buffer_lock:
+                    self._in_flight = {}
+            self._dead_letter(map(self._operation, rejected), "rejected by DynamoDB")
+            # Only throttled and unprocessed writes are worth sending again
+            self._requeue_operations(map(self._operation, unprocessed))
+            with self._buffer_lock:
+                for buffer_key in operations:
+                    if buffer_key not in self._buffer:
+                        self._requeues.pop(buffer_key, None)
+
+    @staticmethod
+    def _operation(request):
+        if "PutRequest" in request:
+            return ("put", request["PutRequest"]["Item"])
+        return ("delete", request["DeleteRequest"]["Key"])
+
+    def _requeue_operations(self, operations):
+        dropped = []
+        with self._buffer_lock:
+            for operation in operations:
+                buffer_key = self._buffer_key(operation[1])
+                # Keep any newer write to the same item that arrived meanwhile
+                if buffer_key in self._buffer:
+                    continue
+                requeues = self._requeues.get(buffer_key, 0) + 1
+                if requeues > MAX_REQUEUES:
+                    self._requeues.pop(buffer_key, None)
+                    dropped.append(operation)
+                    continue
+                self._requeues[buffer_key] = requeues
+                self._buffer[buffer_key] = operation
+        self._dead_letter(dropped, f"still unprocessed after {MAX_REQUEUES} flushes")
+
+    def _dead_letter(self, operations, reason):
+        for action, value in operations:
+            logging.error(
+                f"Dropping DynamoDB {action} for {self._buffer_key(value)}: {reason}"
+            )
+            self.dead_letters.append((action, value, reason))
+
+    def close(self):
+        with self._buffer_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._buffer_lock.notify()
+        self._flusher.join()
+        # Requeues are capped, so draining always finishes
+        while True:
+            with self._buffer_lock:
+                if not self._buffer:
+                    break
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error flushing DynamoDB writes: {str(e)}")
+        self._executor.shutdown(wait=True)
+        atexit.unregister(self.close)
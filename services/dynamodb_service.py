@@ -1,7 +1,54 @@
 import boto3
 import logging
+import random
+import threading
+import time
+from collections import deque
 from botocore.exceptions import ClientError
 
+# DynamoDB limits per BatchWriteItem and BatchGetItem request
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+MAX_BATCH_RETRIES = 8
+BASE_BACKOFF_SECONDS = 0.05
+MAX_BACKOFF_SECONDS = 5
+# Provisioned tables throttle with ProvisionedThroughputExceededException,
+# on-demand tables and account limits with the other two
+THROTTLING_ERRORS = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+# boto3 sessions and resources are expensive to create, so one is kept per
+# region and endpoint and shared by every DynamoDBService instance
+_resources = {}
+_resources_lock = threading.Lock()
+
+
+def get_dynamodb_resource(region_name, endpoint_url=None):
+    key = (region_name, endpoint_url)
+    resource = _resources.get(key)
+    if resource is None:
+        with _resources_lock:
+            resource = _resources.get(key)
+            if resource is None:
+                session = boto3.session.Session(region_name=region_name)
+                resource = session.resource("dynamodb", endpoint_url=endpoint_url)
+                _resources[key] = resource
+    return resource
+
+
+def _backoff(attempt):
+    # Exponential backoff with full jitter
+    delay = min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2**attempt)
+    time.sleep(random.uniform(0, delay))
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
 
 class DynamoDBService:
     def __init__(self, config):
@@ -11,7 +58,11 @@ class DynamoDBService:
 
     def initialize_table(self):
         try:
-            dynamodb = boto3.resource("dynamodb", region_name=self.config["AWS_REGION"])
+            # DYNAMODB_ENDPOINT_URL points at a local stand-in such as
+            # DynamoDB Local or moto's server mode
+            dynamodb = get_dynamodb_resource(
+                self.config["AWS_REGION"], self.config.get("DYNAMODB_ENDPOINT_URL")
+            )
             return dynamodb.Table(self.table_name)
         except Exception as e:
             logging.error(f"Error initializing DynamoDB table: {str(e)}")
@@ -41,9 +92,12 @@ class DynamoDBService:
             logging.error(f"Error in get_uid: {str(e)}")
             return None
 
-    def get_item(self, key):
+    def get_item(
+        self, key, projection_expression=None, expression_attribute_names=None
+    ):
         try:
-            response = self.table.get_item(Key=key)
+            kwargs = self._projection(projection_expression, expression_attribute_names)
+            response = self.table.get_item(Key=key, **kwargs)
             if "Item" not in response:
                 return None
             return response["Item"]
@@ -54,13 +108,26 @@ class DynamoDBService:
             logging.error(f"Error in get_item: {str(e)}")
             return None
         
-    def update_item(self, key, update_expression, expression_attribute_values):
+    def update_item(
+        self,
+        key,
+        update_expression,
+        expression_attribute_values,
+        condition_expression=None,
+        expression_attribute_names=None,
+    ):
         try:
+            kwargs = {}
+            if condition_expression is not None:
+                kwargs["ConditionExpression"] = condition_expression
+            if expression_attribute_names:
+                kwargs["ExpressionAttributeNames"] = expression_attribute_names
             response = self.table.update_item(
                 Key=key,
                 UpdateExpression=update_expression,
                 ExpressionAttributeValues=expression_attribute_values,
                 ReturnValues="UPDATED_NEW",
+                **kwargs,
             )
             return response
         except ClientError as e:
@@ -72,9 +139,12 @@ class DynamoDBService:
             logging.error(f"Error in update_item: {str(e)}")
             return None
         
-    def delete_item(self, key):
+    def delete_item(self, key, condition_expression=None):
         try:
-            response = self.table.delete_item(Key=key)
+            kwargs = {}
+            if condition_expression is not None:
+                kwargs["ConditionExpression"] = condition_expression
+            response = self.table.delete_item(Key=key, **kwargs)
             return response
         except ClientError as e:
             logging.error(
@@ -83,4 +153,186 @@ class DynamoDBService:
             return None
         except Exception as e:
             logging.error(f"Error in delete_item: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+
+    def put_item(self, item, condition_expression=None):
+        try:
+            kwargs = {}
+            if condition_expression is not None:
+                kwargs["ConditionExpression"] = condition_expression
+            response = self.table.put_item(Item=item, **kwargs)
+            return response
+        except ClientError as e:
+            logging.error(f"ClientError in put_item: {e.response['Error']['Message']}")
+            return None
+        except Exception as e:
+            logging.error(f"Error in put_item: {str(e)}")
+            return None
+
+    @staticmethod
+    def _projection(
+        projection_expression,
+        expression_attribute_names,
+        expression_attribute_values=None,
+    ):
+        kwargs = {}
+        if projection_expression is not None:
+            kwargs["ProjectionExpression"] = projection_expression
+        if expression_attribute_names:
+            kwargs["ExpressionAttributeNames"] = expression_attribute_names
+        if expression_attribute_values:
+            kwargs["ExpressionAttributeValues"] = expression_attribute_values
+        return kwargs
+
+    # Writes items and deletes keys 25 requests at a time, resending any
+    # UnprocessedItems and throttled batches with exponential backoff.
+    # DynamoDB rejects a whole batch when one request is invalid (e.g. an
+    # item over 400KB), so a rejected batch is resent one request at a time
+    # and only the offending requests are dropped; they are logged and, if a
+    # list is passed as rejected, appended to it. Returns the requests that
+    # were still unprocessed after the final retry and are safe to resend.
+    def batch_write(self, items=(), delete_keys=(), rejected=None):
+        requests = [{"PutRequest": {"Item": item}} for item in items]
+        requests += [{"DeleteRequest": {"Key": key}} for key in delete_keys]
+        client = self.table.meta.client
+        unprocessed = []
+        chunks = deque(_chunks(requests, BATCH_WRITE_SIZE))
+        while chunks:
+            pending = chunks.popleft()
+            for attempt in range(MAX_BATCH_RETRIES):
+                try:
+                    response = client.batch_write_item(
+                        RequestItems={self.table_name: pending}
+                    )
+                except ClientError as e:
+                    error = e.response["Error"]
+                    if error["Code"] not in THROTTLING_ERRORS:
+                        if len(pending) > 1:
+                            chunks.extend([request] for request in pending)
+                        else:
+                            logging.error(
+                                f"ClientError in batch_write: {error['Message']}"
+                            )
+                            if rejected is not None:
+                                rejected.extend(pending)
+                        pending = []
+                        break
+                else:
+                    unprocessed_items = response.get("UnprocessedItems") or {}
+                    pending = unprocessed_items.get(self.table_name, [])
+                    if not pending:
+                        break
+                _backoff(attempt)
+            unprocessed.extend(pending)
+        if unprocessed:
+            logging.error(f"batch_write left {len(unprocessed)} requests unprocessed")
+        return unprocessed
+
+    # Fetches items 100 keys at a time, retrying UnprocessedKeys with
+    # exponential backoff
+    def batch_get(
+        self,
+        keys,
+        projection_expression=None,
+        expression_attribute_names=None,
+        consistent_read=False,
+    ):
+        client = self.table.meta.client
+        request = self._projection(projection_expression, expression_attribute_names)
+        request["ConsistentRead"] = consistent_read
+        items = []
+        for chunk in _chunks(list(keys), BATCH_GET_SIZE):
+            pending = {self.table_name: {"Keys": chunk, **request}}
+            for attempt in range(MAX_BATCH_RETRIES):
+                try:
+                    response = client.batch_get_item(RequestItems=pending)
+                except ClientError as e:
+                    error = e.response["Error"]
+                    if error["Code"] not in THROTTLING_ERRORS:
+                        logging.error(f"ClientError in batch_get: {error['Message']}")
+                        break
+                else:
+                    items.extend(response["Responses"].get(self.table_name, []))
+                    pending = response.get("UnprocessedKeys") or {}
+                    if not pending:
+                        break
+                _backoff(attempt)
+            if pending:
+                missing = len(pending.get(self.table_name, {}).get("Keys", []))
+                logging.error(f"batch_get left {missing} keys unprocessed")
+        return items
+
+    @staticmethod
+    def _fetch_page(name, operation, kwargs):
+        try:
+            return operation(**kwargs)
+        except ClientError as e:
+            logging.error(f"ClientError in {name}: {e.response['Error']['Message']}")
+            return None
+        except Exception as e:
+            logging.error(f"Error in {name}: {str(e)}")
+            return None
+
+    def _pages(self, name, operation, kwargs, response):
+        while response is not None:
+            yield from response.get("Items", [])
+            last_key = response.get("LastEvaluatedKey")
+            if last_key is None:
+                return
+            kwargs["ExclusiveStartKey"] = last_key
+            response = self._fetch_page(name, operation, kwargs)
+
+    # The first page is fetched up front so an invalid request returns None
+    # like the other methods; a later page that fails ends the iteration
+    def _paginate(self, name, operation, kwargs):
+        response = self._fetch_page(name, operation, kwargs)
+        if response is None:
+            return None
+        return self._pages(name, operation, kwargs, response)
+
+    # Yields every matching item, following LastEvaluatedKey page by page so
+    # large result sets are never held in memory at once
+    def query(
+        self,
+        key_condition_expression,
+        filter_expression=None,
+        projection_expression=None,
+        expression_attribute_names=None,
+        expression_attribute_values=None,
+        index_name=None,
+        page_size=None,
+        scan_forward=True,
+    ):
+        kwargs = self._projection(
+            projection_expression,
+            expression_attribute_names,
+            expression_attribute_values,
+        )
+        kwargs["KeyConditionExpression"] = key_condition_expression
+        kwargs["ScanIndexForward"] = scan_forward
+        if filter_expression is not None:
+            kwargs["FilterExpression"] = filter_expression
+        if index_name is not None:
+            kwargs["IndexName"] = index_name
+        if page_size is not None:
+            kwargs["Limit"] = page_size
+        return self._paginate("query", self.table.query, kwargs)
+
+    def scan(
+        self,
+        filter_expression=None,
+        projection_expression=None,
+        expression_attribute_names=None,
+        expression_attribute_values=None,
+        page_size=None,
+    ):
+        kwargs = self._projection(
+            projection_expression,
+            expression_attribute_names,
+            expression_attribute_values,
+        )
+        if filter_expression is not None:
+            kwargs["FilterExpression"] = filter_expression
+        if page_size is not None:
+            kwargs["Limit"] = page_size
+        return self._paginate("scan", self.table.scan, kwargs)
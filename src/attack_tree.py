@@ -1,6 +1,6 @@
 import re
-from openai import OpenAI
-from openai import AzureOpenAI
+
+from src.llm_client import AZURE, OPENAI, generate
 
 
 # Function to create a prompt to generate an attack tree
@@ -17,93 +17,32 @@ APPLICATION DESCRIPTION: {app_input}
     return prompt
 
 
-# Function to get attack tree from the GPT response.
-def get_attack_tree(api_key, model_name, prompt):
-    client = OpenAI(api_key=api_key)
-
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[
-            {
-                "role": "system",
-                "content": """
-Act as a cyber security expert with more than 20 years experience of using the STRIDE threat modelling methodology to produce comprehensive threat models for a wide range of applications. Your task is to use the application description provided to you to produce an attack tree in Mermaid syntax. The attack tree should reflect the potential threats for the application based on the details given.
-
-You MUST only respond with the Mermaid code block. See below for a simple example of the required format and syntax for your output.
-
-```mermaid
-graph TD
-    A[Enter Chart Definition] --> B(Preview)
-    B --> C{{decide}}
-    C --> D["Keep"]
-    C --> E["Edit Definition (Edit)"]
-    E --> B
-    D --> F["Save Image and Code"]
-    F --> B
-```
-
-IMPORTANT: Round brackets are special characters in Mermaid syntax. If you want to use round brackets inside a node label you MUST wrap the label in double quotes. For example, ["Example Node Label (ENL)"].
-""",
-            },
-            {"role": "user", "content": prompt},
-        ],
+# Function to remove Markdown code block delimiters from the Mermaid code
+def strip_mermaid_fences(attack_tree_code):
+    return re.sub(
+        r"^```mermaid\s*|\s*```$", "", attack_tree_code, flags=re.MULTILINE
     )
 
-    # Access the 'content' attribute of the 'message' object directly
-    attack_tree_code = response.choices[0].message.content
 
-    # Remove Markdown code block delimiters using regular expression
-    attack_tree_code = re.sub(
-        r"^```mermaid\s*|\s*```$", "", attack_tree_code, flags=re.MULTILINE
-    )
+# Function to get attack tree from the GPT response.
+def get_attack_tree(api_key, model_name, prompt):
+    attack_tree_code = generate("attack_tree", prompt, OPENAI, model_name, api_key)
 
-    return attack_tree_code
+    return strip_mermaid_fences(attack_tree_code)
 
 
 # Function to get attack tree from the Azure OpenAI response.
 def get_attack_tree_azure(
     azure_api_endpoint, azure_api_key, azure_api_version, azure_deployment_name, prompt
 ):
-    client = AzureOpenAI(
-        azure_endpoint=azure_api_endpoint,
-        api_key=azure_api_key,
+    attack_tree_code = generate(
+        "attack_tree",
+        prompt,
+        AZURE,
+        azure_deployment_name,
+        azure_api_key,
+        endpoint=azure_api_endpoint,
         api_version=azure_api_version,
     )
 
-    response = client.chat.completions.create(
-        model=azure_deployment_name,
-        messages=[
-            {
-                "role": "system",
-                "content": """
-Act as a cyber security expert with more than 20 years experience of using the STRIDE threat modelling methodology to produce comprehensive threat models for a wide range of applications. Your task is to use the application description provided to you to produce an attack tree in Mermaid syntax. The attack tree should reflect the potential threats for the application based on the details given.
-
-You MUST only respond with the Mermaid code block. See below for a simple example of the required format and syntax for your output.
-
-```mermaid
-graph TD
-    A[Enter Chart Definition] --> B(Preview)
-    B --> C{{decide}}
-    C --> D["Keep"]
-    C --> E["Edit Definition (Edit)"]
-    E --> B
-    D --> F["Save Image and Code"]
-    F --> B
-```
-
-IMPORTANT: Round brackets are special characters in Mermaid syntax. If you want to use round brackets inside a node label you MUST wrap the label in double quotes. For example, ["Example Node Label (ENL)"].
-""",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-
-    # Access the 'content' attribute of the 'message' object directly
-    attack_tree_code = response.choices[0].message.content
-
-    # Remove Markdown code block delimiters using regular expression
-    attack_tree_code = re.sub(
-        r"^```mermaid\s*|\s*```$", "", attack_tree_code, flags=re.MULTILINE
-    )
-
-    return attack_tree_code
+    return strip_mermaid_fences(attack_tree_code)
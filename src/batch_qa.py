@@ -0,0 +1,160 @@
+import argparse
+import csv
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.db_ops import count_documents
+from src.query_data import SESSION_ARTIFACTS, answer_rag
+from src.threats import ThreatModel
+
+DEFAULT_CONCURRENCY = 4
+SNAPSHOT_FIELDS = [
+    "app_type",
+    "sensitive_data",
+    "internet_facing",
+    "authentication",
+    *SESSION_ARTIFACTS,
+]
+RESULT_COLUMNS = ["#", "Question", "Answer", "Seconds", "Error"]
+
+
+# Function to read questions from a CSV with a "question" column or from a
+# plain text file with one question per line
+def read_questions(path):
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = csv.DictReader(f)
+            return [row["question"] for row in rows if row.get("question")]
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# Function to load a saved threat model as the session data answer_rag expects.
+# Accepts either a dict of session fields or a record written by
+# src.batch_threat_model.
+def load_snapshot(path):
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+
+    if "results" in snapshot:
+        application = snapshot.get("application", {})
+        results = snapshot["results"]
+        snapshot = {
+            "app_type": application.get("app_type"),
+            "sensitive_data": application.get("sensitive_data"),
+            "internet_facing": application.get("internet_facing"),
+            "authentication": application.get("authentication"),
+            "image_analysis_content": application.get("description"),
+            "threat_model": results.get("threat_model", {}).get("threat_model", []),
+            "attack_tree": results.get("attack_tree"),
+            "mitigations": results.get("mitigations"),
+            "dread_assessment": results.get("dread_assessment"),
+            "test_cases": results.get("test_cases"),
+        }
+
+    session_data = {field: snapshot.get(field) or "" for field in SNAPSHOT_FIELDS}
+    # Rendered as a compact table when the artifacts are added to the prompt
+    if session_data["threat_model"]:
+        threat_model = ThreatModel.coerce(session_data["threat_model"])
+        session_data["threat_model"] = threat_model
+    return session_data
+
+
+def answer_question(question, session_data, fetch_context):
+    start = time.perf_counter()
+    # No chat history, so every prompt starts with the same session prefix
+    # and the provider can reuse its cached prompt prefix across questions
+    try:
+        response = answer_rag(question, "", session_data, fetch_context)
+    except Exception as e:
+        return None, time.perf_counter() - start, str(e) or type(e).__name__
+    elapsed = time.perf_counter() - start
+    if not response.content:
+        return None, elapsed, "No answer returned"
+    return response.content, elapsed, None
+
+
+# Function to answer every question against one threat model concurrently and
+# stream each row into a write-only workbook as soon as it is answered. At
+# most `concurrency` questions are in flight and each future is dropped once
+# its row is written, so finished answers are not kept in memory.
+def run_batch_qa(
+    questions,
+    session_data,
+    output_path,
+    concurrency=DEFAULT_CONCURRENCY,
+    fetch_context=None,
+):
+    # Imported here so the app does not load openpyxl unless a batch runs
+    from openpyxl import Workbook
+
+    if fetch_context is None:
+        fetch_context = count_documents() > 0
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Answers")
+    sheet.append(RESULT_COLUMNS)
+
+    failures = 0
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="qa"
+    ) as executor:
+        pending = iter(enumerate(questions, start=1))
+        futures = {}
+
+        def submit_next():
+            item = next(pending, None)
+            if item is not None:
+                future = executor.submit(
+                    answer_question, item[1], session_data, fetch_context
+                )
+                futures[future] = item
+
+        for _ in range(concurrency):
+            submit_next()
+        while futures:
+            done, _not_done = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                number, question = futures.pop(future)
+                try:
+                    answer, elapsed, error = future.result()
+                except Exception as e:
+                    answer, elapsed, error = None, None, str(e)
+                if error:
+                    failures += 1
+                sheet.append(
+                    [number, question, answer, round(elapsed or 0, 2), error]
+                )
+                status = "⚠️" if error else "✅"
+                print(f"{status} [{number}/{len(questions)}] {question}")
+                submit_next()
+
+    workbook.save(output_path)
+    print(f"Saved {len(questions)} answers to {output_path} ({failures} failed)")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Answer a list of questions about a saved threat model."
+    )
+    parser.add_argument("questions", type=str, help="Text or CSV file of questions")
+    parser.add_argument("snapshot", type=str, help="JSON threat model snapshot")
+    parser.add_argument("-o", "--output", type=str, default="answers.xlsx")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--no-documents",
+        action="store_true",
+        help="Do not add excerpts from the uploaded documents",
+    )
+    args = parser.parse_args()
+
+    failures = run_batch_qa(
+        read_questions(args.questions),
+        load_snapshot(args.snapshot),
+        args.output,
+        concurrency=args.concurrency,
+        fetch_context=False if args.no_documents else None,
+    )
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,251 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from src.attack_tree import create_attack_tree_prompt
+from src.llm_client import AZURE, AZURE_API_VERSION, GOOGLE, OPENAI
+from src.pipeline import run_pipeline
+from src.rate_limiter import TokenRateLimiter
+from src.response_cache import make_cache_key
+from threat_models.owasp import create_owasp_prompt
+from threat_models.pasta import create_pasta_prompt
+from threat_models.stride import create_stride_threat_model_prompt
+
+load_dotenv()
+
+METHODOLOGY_PROMPTS = {
+    "STRIDE": create_stride_threat_model_prompt,
+    "PASTA": create_pasta_prompt,
+    "OWASP": create_owasp_prompt,
+}
+
+APPLICATION_FIELDS = [
+    "app_type",
+    "authentication",
+    "internet_facing",
+    "sensitive_data",
+    "description",
+]
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+
+# Function to read applications from a CSV or JSONL file. Each application
+# needs the APPLICATION_FIELDS columns; an "id" or "name" column is used as
+# its identifier, otherwise one is derived from the application details.
+def read_applications(path):
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+
+    applications = []
+    for line_number, row in enumerate(rows, start=1):
+        missing = [field for field in APPLICATION_FIELDS if not row.get(field)]
+        if missing:
+            print(f"Skipping application {line_number}: missing {', '.join(missing)}")
+            continue
+        app_id = row.get("id") or row.get("name")
+        if not app_id:
+            app_id = make_cache_key(*(row[field] for field in APPLICATION_FIELDS))[:16]
+        applications.append({"id": str(app_id), **row})
+    return applications
+
+
+# Function to find the applications already modelled without errors, so an
+# interrupted run picks up where it stopped
+def load_completed_ids(output_path):
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            if not record.get("errors"):
+                completed.add(record["id"])
+    return completed
+
+
+def build_settings(provider, model):
+    if provider == AZURE:
+        return {
+            "provider": AZURE,
+            "model": model,
+            "api_key": os.getenv("AZURE_API_KEY"),
+            "endpoint": os.getenv("AZURE_API_ENDPOINT"),
+            "api_version": os.getenv("AZURE_API_VERSION", AZURE_API_VERSION),
+        }
+    if provider == GOOGLE:
+        return {
+            "provider": GOOGLE,
+            "model": model,
+            "api_key": os.getenv("GOOGLE_API_KEY"),
+        }
+    return {"provider": OPENAI, "model": model, "api_key": os.getenv("OPENAI_API_KEY")}
+
+
+def model_application(application, methodology, settings, rate_limiter):
+    app_details = (
+        application["app_type"],
+        application["authentication"],
+        application["internet_facing"],
+        application["sensitive_data"],
+        application["description"],
+    )
+    results, errors = {}, {}
+    for name, result, error in run_pipeline(
+        settings,
+        METHODOLOGY_PROMPTS[methodology](*app_details),
+        create_attack_tree_prompt(*app_details),
+        rate_limiter=rate_limiter,
+    ):
+        if error is not None:
+            errors[name] = str(error)
+        else:
+            results[name] = result
+    return {
+        "id": application["id"],
+        "application": application,
+        "methodology": methodology,
+        "model": settings["model"],
+        "results": results,
+        "errors": errors,
+        "completed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+# Function to rank DREAD-scored threats across every application in the
+# output file. Later records for an application replace earlier ones.
+def summarise_portfolio(output_path, top_n=10):
+    # Imported here so pandas is only loaded when a summary is printed
+    from src.dread_scoring import DreadAssessment
+
+    latest = {}
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            dread_assessment = record.get("results", {}).get("dread_assessment")
+            if dread_assessment:
+                latest[record["id"]] = dread_assessment
+
+    portfolio = DreadAssessment.concat(
+        DreadAssessment.from_json(dread_assessment, application=app_id)
+        for app_id, dread_assessment in latest.items()
+    )
+    if not len(portfolio):
+        print("No DREAD assessments to summarise")
+        return portfolio
+
+    print(f"\nTop {top_n} threats across {len(latest)} applications:")
+    print(portfolio.top(top_n)[["Application", "Threat Type", "Risk Score"]])
+    print("\nRisk by threat category:")
+    print(portfolio.by_category().to_string(index=False))
+    return portfolio
+
+
+# Function to model every application with bounded concurrency. Each record
+# is appended and flushed as soon as it finishes; applications that already
+# have an error-free record in the output file are skipped.
+def run_batch(
+    input_path,
+    output_path,
+    methodology="STRIDE",
+    settings=None,
+    concurrency=DEFAULT_CONCURRENCY,
+    requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+):
+    applications = read_applications(input_path)
+    completed = load_completed_ids(output_path)
+    pending = [app for app in applications if app["id"] not in completed]
+    print(
+        f"👉 Modelling {len(pending)} applications "
+        f"({len(applications) - len(pending)} already done)"
+    )
+
+    # Shared by every worker so the combined call rate stays under the limit
+    rate_limiter = TokenRateLimiter(requests_per_minute)
+    write_lock = threading.Lock()
+    failures = 0
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "a", encoding="utf-8") as output, ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="batch"
+    ) as executor:
+        futures = {
+            executor.submit(
+                model_application, app, methodology, settings, rate_limiter
+            ): app
+            for app in pending
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            app = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {
+                    "id": app["id"],
+                    "application": app,
+                    "errors": {"run": str(e)},
+                }
+            with write_lock:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                os.fsync(output.fileno())
+
+            if record["errors"]:
+                failures += 1
+                print(f"⚠️ [{done}/{len(pending)}] {app['id']}: {record['errors']}")
+            else:
+                print(f"✅ [{done}/{len(pending)}] {app['id']}")
+
+    print(f"Finished batch: {len(pending) - failures} succeeded, {failures} failed")
+    summarise_portfolio(output_path)
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate threat models for many applications at once."
+    )
+    parser.add_argument("input", type=str, help="CSV or JSONL file of applications")
+    parser.add_argument(
+        "-o", "--output", type=str, default="threat_models.jsonl", help="JSONL output"
+    )
+    parser.add_argument(
+        "--methodology", choices=sorted(METHODOLOGY_PROMPTS), default="STRIDE"
+    )
+    parser.add_argument("--provider", choices=[OPENAI, AZURE, GOOGLE], default=OPENAI)
+    parser.add_argument("--model", type=str, default="gpt-4o")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument(
+        "--requests-per-minute", type=int, default=DEFAULT_REQUESTS_PER_MINUTE
+    )
+    args = parser.parse_args()
+
+    failures = run_batch(
+        args.input,
+        args.output,
+        methodology=args.methodology,
+        settings=build_settings(args.provider, args.model),
+        concurrency=args.concurrency,
+        requests_per_minute=args.requests_per_minute,
+    )
+    raise SystemExit(1 if failures else 0)
@@ -0,0 +1,154 @@
+import math
+import os
+import pickle
+import re
+from collections import Counter, defaultdict
+
+from src.singleton import Singleton
+
+BM25_INDEX_PATH = os.path.join("chroma", "bm25_index.pkl")
+
+# Keep identifiers such as "CVE-2024-3094", "AC-2.1" or "4.2.1" whole
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_.:/][a-z0-9]+)*")
+_PART_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        # Also index the parts so "CVE-2024-3094" matches a query for "3094"
+        parts = _PART_PATTERN.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+# Local inverted index scored with Okapi BM25. It is kept alongside the
+# Chroma collection so exact terms like control IDs, CVE numbers and clause
+# references can be matched even when dense embeddings miss them.
+class BM25Index:
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, ids, texts):
+        for doc_id, text in zip(ids, texts):
+            if doc_id in self.doc_lengths:
+                self.remove([doc_id])
+            term_counts = Counter(tokenize(text))
+            for term, count in term_counts.items():
+                self.postings[term][doc_id] = count
+            self.doc_terms[doc_id] = list(term_counts)
+            length = sum(term_counts.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+
+    def remove(self, ids):
+        for doc_id in ids:
+            if doc_id not in self.doc_lengths:
+                continue
+            for term in self.doc_terms.pop(doc_id):
+                postings = self.postings[term]
+                del postings[doc_id]
+                if not postings:
+                    del self.postings[term]
+            self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def search(self, query, k=10):
+        if not self.doc_lengths:
+            return []
+        num_docs = len(self.doc_lengths)
+        avg_length = self.total_length / num_docs
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            doc_freq = len(postings)
+            idf = math.log(1 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+            for doc_id, count in postings.items():
+                norm = self.k1 * (
+                    1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length
+                )
+                scores[doc_id] += idf * count * (self.k1 + 1) / (count + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self, path=BM25_INDEX_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            state = (
+                dict(self.postings),
+                self.doc_terms,
+                self.doc_lengths,
+                self.total_length,
+            )
+            pickle.dump(state, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=BM25_INDEX_PATH):
+        index = cls()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                (
+                    postings,
+                    index.doc_terms,
+                    index.doc_lengths,
+                    index.total_length,
+                ) = pickle.load(f)
+            index.postings.update(postings)
+        return index
+
+
+_bm25_index = Singleton(BM25Index.load)
+# Set when the in-memory index has changes that are not on disk yet
+_bm25_dirty = False
+
+
+def get_bm25_index():
+    return _bm25_index.get()
+
+
+# Function to add or remove chunks in memory. Rewriting the pickle is
+# proportional to the whole index, so callers persist once per ingested file
+# with save_bm25_index() rather than on every update.
+def update_bm25_index(add_ids=(), add_texts=(), remove_ids=()):
+    global _bm25_dirty
+    index = get_bm25_index()
+    with _bm25_index.lock:
+        if remove_ids:
+            index.remove(remove_ids)
+        if add_ids:
+            index.add(add_ids, add_texts)
+        _bm25_dirty = True
+
+
+def save_bm25_index():
+    global _bm25_dirty
+    with _bm25_index.lock:
+        if _bm25_index.instance is None or not _bm25_dirty:
+            return
+        _bm25_index.instance.save()
+        _bm25_dirty = False
+
+
+def invalidate_bm25_index():
+    global _bm25_dirty
+    with _bm25_index.lock:
+        _bm25_index.reset()
+        _bm25_dirty = False
+
+
+def search_bm25(query, k=10):
+    index = get_bm25_index()
+    with _bm25_index.lock:
+        return index.search(query, k)
@@ -0,0 +1,101 @@
+import os
+
+import tiktoken
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+ARTIFACT_TOKEN_BUDGET = int(os.getenv("ARTIFACT_TOKEN_BUDGET", 6000))
+CHUNK_SEPARATOR = "\n\n---\n\n"
+# Matches the chunk_overlap used when splitting documents in db_ops
+MAX_CHUNK_OVERLAP = 80
+MIN_CHUNK_OVERLAP = 20
+
+try:
+    _encoding = tiktoken.encoding_for_model("gpt-4o-mini")
+except KeyError:
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text):
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text, max_tokens):
+    tokens = _encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return _encoding.decode(tokens[:max_tokens]) + " …"
+
+
+def _trim_overlap(previous_text, text):
+    # Neighbouring chunks share up to chunk_overlap characters; drop the
+    # repeated prefix so it is only sent once
+    longest = min(len(previous_text), len(text), MAX_CHUNK_OVERLAP)
+    for size in range(longest, MIN_CHUNK_OVERLAP - 1, -1):
+        if previous_text.endswith(text[:size]):
+            return text[size:]
+    return text
+
+
+# Function to turn similarity search results into a deduplicated context
+# block that fits the token budget. Chroma returns distances, so lower
+# scores are better. Returns the packed text and the documents it includes.
+def pack_context(results, token_budget=CONTEXT_TOKEN_BUDGET):
+    selected = []
+    seen_ids = set()
+    seen_texts = []
+    last_text_by_source = {}
+    used_tokens = 0
+    separator_tokens = count_tokens(CHUNK_SEPARATOR)
+
+    for doc, _score in sorted(results, key=lambda result: result[1]):
+        chunk_id = doc.metadata.get("id")
+        text = doc.page_content.strip()
+        if not text or (chunk_id is not None and chunk_id in seen_ids):
+            continue
+        # Skip chunks whose text is already covered by a selected chunk
+        if any(text in seen_text for seen_text in seen_texts):
+            continue
+
+        source = doc.metadata.get("source")
+        if source in last_text_by_source:
+            text = _trim_overlap(last_text_by_source[source], text)
+
+        tokens = count_tokens(text) + (separator_tokens if selected else 0)
+        if used_tokens + tokens > token_budget:
+            continue
+
+        selected.append((doc, text))
+        seen_ids.add(chunk_id)
+        seen_texts.append(doc.page_content)
+        last_text_by_source[source] = doc.page_content
+        used_tokens += tokens
+
+    context_text = CHUNK_SEPARATOR.join(text for _doc, text in selected)
+    return context_text, [doc for doc, _text in selected]
+
+
+# Function to fit the session artifacts into a shared token budget. Small
+# artifacts are kept whole and the remaining budget is split evenly across
+# the larger ones, which are truncated to their share.
+def fit_artifacts(artifacts, token_budget=ARTIFACT_TOKEN_BUDGET):
+    texts = {name: str(value or "") for name, value in artifacts.items()}
+    token_counts = {name: count_tokens(text) for name, text in texts.items()}
+
+    fitted = {}
+    remaining_budget = token_budget
+    remaining = sorted(token_counts, key=token_counts.get)
+    while remaining:
+        share = remaining_budget // len(remaining)
+        name = remaining[0]
+        if token_counts[name] > share:
+            break
+        fitted[name] = texts[name]
+        remaining_budget -= token_counts[name]
+        remaining.pop(0)
+
+    if remaining:
+        share = max(remaining_budget // len(remaining), 0)
+        for name in remaining:
+            fitted[name] = truncate_to_tokens(texts[name], share)
+
+    return fitted
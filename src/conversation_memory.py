@@ -0,0 +1,123 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.context_packer import count_tokens, truncate_to_tokens
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 1500))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", 400))
+RECENT_TURNS = 6
+SUMMARY_MODEL = "gpt-4o-mini"
+
+SUMMARY_PROMPT = """
+Progressively summarise the conversation between a user and Bolt, a cyber security assistant, adding onto the existing summary.
+Keep facts, decisions, application details and open questions. Be concise and do not exceed {max_words} words.
+
+Existing summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:
+"""
+
+# Summaries are produced off the request path by a small shared pool
+_summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+
+
+def _format_turns(turns):
+    return "\n".join(f"{speaker}: {message}" for speaker, message in turns)
+
+
+def summarise_turns(summary, turns, max_tokens=SUMMARY_TOKEN_BUDGET):
+    from langchain_openai import ChatOpenAI
+
+    model = ChatOpenAI(model=SUMMARY_MODEL, max_tokens=max_tokens)
+    prompt = SUMMARY_PROMPT.format(
+        max_words=int(max_tokens * 0.75),
+        summary=summary or "None",
+        new_lines=_format_turns(turns),
+    )
+    return model.invoke(prompt).content.strip()
+
+
+# Conversation memory for a single chat. The most recent turns are kept
+# verbatim while older turns are folded into a rolling summary in the
+# background, so the history sent with each question stays within a fixed
+# token budget no matter how long the chat runs.
+class ConversationMemory:
+    def __init__(
+        self,
+        max_history_tokens=HISTORY_TOKEN_BUDGET,
+        recent_turns=RECENT_TURNS,
+        summariser=summarise_turns,
+    ):
+        self.max_history_tokens = max_history_tokens
+        self.recent_turns = recent_turns
+        self.summariser = summariser
+        self.turns = []
+        self.summary = ""
+        # Number of turns already folded into the summary
+        self.summarised_upto = 0
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def add(self, speaker, message):
+        with self._lock:
+            self.turns.append((speaker, message))
+        self._schedule_summary()
+
+    def _schedule_summary(self):
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return
+            upto = len(self.turns) - self.recent_turns
+            if upto <= self.summarised_upto:
+                return
+            self._pending = _summary_executor.submit(self._summarise, upto)
+
+    def _summarise(self, upto):
+        with self._lock:
+            summary = self.summary
+            turns = self.turns[self.summarised_upto : upto]
+        try:
+            new_summary = self.summariser(summary, turns)
+        except Exception as e:
+            print(f"Failed to summarise conversation history: {e}")
+            with self._lock:
+                self._pending = None
+            return
+        with self._lock:
+            self.summary = new_summary
+            self.summarised_upto = upto
+            self._pending = None
+        # More turns may have aged out while this summary was running
+        self._schedule_summary()
+
+    def render(self):
+        with self._lock:
+            summary = self.summary
+            verbatim = list(self.turns[self.summarised_upto :])
+
+        parts = []
+        budget = self.max_history_tokens
+        if summary:
+            summary_text = "Summary of earlier conversation: " + truncate_to_tokens(
+                summary, SUMMARY_TOKEN_BUDGET
+            )
+            budget -= count_tokens(summary_text)
+            parts.append(summary_text)
+
+        # Keep the newest turns that fit; older ones are still awaiting summary
+        kept = []
+        for speaker, message in reversed(verbatim):
+            line = f"{speaker}: {message}"
+            tokens = count_tokens(line)
+            if tokens > budget:
+                break
+            kept.append(line)
+            budget -= tokens
+        parts.extend(reversed(kept))
+
+        return "\n".join(parts)
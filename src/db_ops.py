@@ -1,24 +1,80 @@
 from typing import List
+import hashlib
+import json
 import os
 import shutil
-import psutil
+import threading
 import time
-from collections import Counter
-import matplotlib.pyplot as plt
 from langchain_community.vectorstores import Chroma
-from langchain_community.document_loaders.pdf import PyPDFDirectoryLoader
+from langchain_community.document_loaders.pdf import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders.csv_loader import CSVLoader
 from langchain.schema import Document
 
+from src.bm25_index import (
+    get_bm25_index,
+    invalidate_bm25_index,
+    save_bm25_index,
+    update_bm25_index,
+)
+from src.embedding_pipeline import embed_and_store
 from src.get_embedding_function import get_embedding_function
+from src.singleton import Singleton
+from src.split_report import (
+    compute_split_statistics,
+    record_split_statistics,
+    schedule_split_report,
+)
 
 PDF_DATA_PATH = "./data/pdf"
 CSV_DATA_PATH = "./data/csv"
 CHROMA_PATH = "chroma"
+# The manifest lives inside the Chroma directory so clearing the database
+# also forgets what was ingested
+MANIFEST_PATH = os.path.join(CHROMA_PATH, "ingest_manifest.json")
+# Chunk IDs per Chroma get() when checking which chunks are already stored
+ID_LOOKUP_BATCH_SIZE = 1000
+
+_manifest_lock = threading.Lock()
+
+
+def _open_chroma_db():
+    return Chroma(
+        persist_directory=CHROMA_PATH,
+        embedding_function=get_embedding_function(),
+    )
+
+
+_chroma_db = Singleton(_open_chroma_db)
+
+
+# Function to get the process-wide Chroma handle. Opening the store loads the
+# SQLite and HNSW files, so it is done once and shared by every session.
+def get_chroma_db():
+    return _chroma_db.get()
+
+
+# Function to drop the shared handle so the next caller reopens the store
+def invalidate_chroma_db():
+    _chroma_db.reset()
+
+
+def count_documents():
+    return get_chroma_db()._collection.count()
 
 
 def add_data(file):
+    file_path = save_uploaded_file(file)
+    if file_path is None:
+        return
+
+    ingest_and_record(file_path)
+    reload_chroma_db()
+    print(f"File {file_path} processed successfully.")
+
+
+# Function to save an uploaded file into the data directory, returning its path
+def save_uploaded_file(file):
     data_dir = "data"
     pdf_dir = os.path.join(data_dir, "pdf")
     csv_dir = os.path.join(data_dir, "csv")
@@ -62,9 +118,7 @@ def add_data(file):
         print(f"File {file_path} does not exist after attempting to save it.")
         return
 
-    populate_database()
-    reload_chroma_db()
-    print(f"File {file_path} processed successfully.")
+    return file_path
 
 
 def populate_database(reset=False):
@@ -72,36 +126,160 @@ def populate_database(reset=False):
         print("✨ Clearing Database")
         clear_database()
 
-    documents = []
-
-    # Load all PDF documents from the directory
-    pdf_data_path = "./data/pdf"
-    print("Loading PDF documents...")
-    documents.extend(load_pdf_documents(pdf_data_path))
-
-    # Load individual CSV documents
-    csv_data_path = "./data/csv"
-    for file in os.listdir(csv_data_path):
-        file_path = os.path.join(csv_data_path, file)
-        if file.endswith(".csv"):
-            print(f"Loading CSV document: {file}")
-            documents.extend(load_csv_documents(file_path))
-        else:
-            print(f"Unsupported file type for {file}. Skipping.")
+    data_files = list_data_files()
+
+    # Remove chunks of files that have been deleted since the last run
+    with _manifest_lock:
+        manifest = load_manifest()
+        for source in list(manifest):
+            if source not in data_files:
+                print(f"🗑️ Removing chunks for deleted file: {source}")
+                delete_from_chroma(manifest[source]["chunk_ids"])
+                del manifest[source]
+        save_bm25_index()
+        save_manifest(manifest)
+
+    # Only load, split and embed files that are new or have changed
+    for source in data_files:
+        if is_file_unchanged(source, manifest.get(source)):
+            print(f"✅ Unchanged, skipping: {source}")
+            continue
+        ingest_and_record(source)
+
+
+def list_data_files():
+    data_files = []
+    for directory, extension in [(PDF_DATA_PATH, ".pdf"), (CSV_DATA_PATH, ".csv")]:
+        if not os.path.exists(directory):
+            continue
+        for file in sorted(os.listdir(directory)):
+            if file.endswith(extension):
+                data_files.append(os.path.normpath(os.path.join(directory, file)))
+            else:
+                print(f"Unsupported file type for {file}. Skipping.")
+    return data_files
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Ignoring unreadable ingestion manifest: {e}")
+        return {}
+
+
+def save_manifest(manifest):
+    os.makedirs(CHROMA_PATH, exist_ok=True)
+    # Write to a temporary file first so a crash never leaves a torn manifest
+    tmp_path = f"{MANIFEST_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+
+def hash_file(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+# Quick check on size and mtime; touched files are compared by content hash
+# in ingest_file
+def is_file_unchanged(file_path, entry):
+    if entry is None:
+        return False
+    stat = os.stat(file_path)
+    return stat.st_size == entry["size"] and stat.st_mtime == entry["mtime"]
+
+
+def load_file_documents(file_path):
+    if file_path.endswith(".pdf"):
+        return PyPDFLoader(file_path).load()
+    if file_path.endswith(".csv"):
+        return load_csv_documents(file_path)
+    raise ValueError(f"Unsupported file type: {file_path}")
+
+
+# Function to (re)ingest a single file and record it in the manifest.
+# Chunks from a previous version of the file are removed first so stale
+# content never lingers in the vector store. progress, if given, is called
+# with a stage name and a completion fraction between 0 and 1.
+def ingest_file(file_path, manifest, progress=None, load_documents=None):
+    progress = progress or (lambda stage, fraction: None)
+    load_documents = load_documents or load_file_documents
+
+    source = os.path.normpath(file_path)
+    stat = os.stat(source)
+    sha256 = hash_file(source)
+
+    previous = manifest.get(source)
+    if previous is not None and previous["sha256"] == sha256:
+        previous["mtime"] = stat.st_mtime
+        print(f"✅ Content unchanged, skipping: {source}")
+        progress("unchanged", 1.0)
+        return
 
-    print(f"Loaded {len(documents)} documents")
+    # The BM25 index is written once per file, even if ingestion fails part
+    # way, so it stays in step with whatever reached the vector store
+    try:
+        if previous is not None:
+            stale = len(previous["chunk_ids"])
+            print(f"♻️ Removing {stale} stale chunks for {source}")
+            delete_from_chroma(previous["chunk_ids"])
+
+        print(f"Loading document: {source}")
+        progress("loading", 0.05)
+        documents = load_documents(source)
+        print(f"Loaded {len(documents)} documents")
+
+        print("Splitting documents into chunks...")
+        progress("splitting", 0.3)
+        chunks = split_documents(documents)
+        print(f"Split into {len(chunks)} chunks")
+
+        print("Adding chunks to Chroma database...")
+        progress("embedding", 0.4)
+        # add_to_chroma assigns each chunk its "id" metadata
+        add_to_chroma(
+            chunks,
+            progress=lambda done, total: progress(
+                "embedding", 0.4 + 0.6 * done / total
+            ),
+        )
+    finally:
+        save_bm25_index()
+
+    manifest[source] = {
+        "path": source,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "sha256": sha256,
+        "chunk_ids": [chunk.metadata["id"] for chunk in chunks],
+    }
+    progress("done", 1.0)
 
-    print("Splitting documents into chunks...")
-    chunks = split_documents(documents)
-    print(f"Split into {len(chunks)} chunks")
 
-    print("Adding chunks to Chroma database...")
-    add_to_chroma(chunks)
+# Function to ingest one file and persist its manifest entry. Safe to call
+# from several threads at once: the manifest is only read and written under
+# a lock, while loading, splitting and embedding run unlocked.
+def ingest_and_record(file_path, progress=None, load_documents=None):
+    source = os.path.normpath(file_path)
+    with _manifest_lock:
+        previous = load_manifest().get(source)
 
+    entries = {source: previous} if previous is not None else {}
+    ingest_file(source, entries, progress=progress, load_documents=load_documents)
 
-def load_pdf_documents(directory_path):
-    document_loader = PyPDFDirectoryLoader(directory_path)
-    return document_loader.load()
+    if source in entries:
+        with _manifest_lock:
+            manifest = load_manifest()
+            manifest[source] = entries[source]
+            save_manifest(manifest)
 
 
 def load_csv_documents(file_path):
@@ -125,90 +303,35 @@ def split_documents(documents: List[Document]):
     )
 
     splits = text_splitter.split_documents(documents)
+    if not splits:
+        return splits
 
-    # Collect statistics
-    split_lengths = [len(split.page_content) for split in splits]
-    stats = {
-        "num_splits": len(splits),
-        "min_split_length": min(split_lengths),
-        "max_split_length": max(split_lengths),
-        "avg_split_length": sum(split_lengths) / len(split_lengths),
-        "split_length_distribution": Counter(split_lengths),
-    }
-
-    # Define save path
-    save_path = "embedding_statistics"
-    os.makedirs(save_path, exist_ok=True)
-
-    # Plot split length distribution
-    lengths = list(stats["split_length_distribution"].keys())
-    counts = list(stats["split_length_distribution"].values())
-
-    plt.figure(figsize=(10, 6))
-    plt.bar(lengths, counts)
-    plt.xlabel("Split Length")
-    plt.ylabel("Count")
-    plt.title("Split Length Distribution")
-    plt.savefig(os.path.join(save_path, "split_length_distribution.png"))
-    plt.close()
-
-    # Assuming similarity scores and document segment indices are available
-    similarity_scores = [0.5] * len(split_lengths)  # Placeholder values
-    document_segment_indices = list(range(len(split_lengths)))  # Placeholder values
-
-    plt.figure(figsize=(12, 8))
-
-    # Plot similarity scores vs. document segment index
-    plt.subplot(2, 1, 1)
-    plt.plot(
-        document_segment_indices,
-        similarity_scores,
-        marker="o",
-        linestyle="-",
-        label="Similarity Scores",
+    # Record statistics without blocking on plotting
+    stats = compute_split_statistics(
+        [len(split.page_content) for split in splits],
+        sources=[split.metadata.get("source") for split in splits],
     )
-    plt.axhline(
-        y=0.226, color="g", linestyle="-", label="Threshold Similarity Score"
-    )  # Example threshold
-    for i in range(len(similarity_scores)):
-        plt.axvline(x=i, color="r", linestyle="--")
-    plt.xlabel("Document Segment Index")
-    plt.ylabel("Similarity Score")
-    plt.title("Similarity Scores vs. Document Segment Index")
-    plt.legend()
-
-    # Plot split token sizes
-    plt.subplot(2, 1, 2)
-    plt.bar(range(len(split_lengths)), split_lengths)
-    plt.xlabel("Split Index")
-    plt.ylabel("Token Count")
-    plt.title("Split Token Sizes")
-
-    plt.tight_layout()
-    plt.savefig(os.path.join(save_path, "similarity_scores_and_split_token_sizes.png"))
-    plt.close()
-
-    # Save statistics to a file
-    with open(os.path.join(save_path, "statistics.txt"), "w") as f:
-        for key, value in stats.items():
-            f.write(f"{key}: {value}\n")
+    record_split_statistics(stats)
+    schedule_split_report(stats)
 
     return splits
 
 
-def add_to_chroma(chunks: list[Document]):
+def add_to_chroma(chunks: list[Document], progress=None):
     # Load the existing database.
-    db = Chroma(
-        persist_directory=CHROMA_PATH, embedding_function=get_embedding_function()
-    )
+    db = get_chroma_db()
 
     # Calculate Page IDs.
     chunks_with_ids = calculate_chunk_ids(chunks)
 
-    # Add or Update the documents.
-    existing_items = db.get(include=[])  # IDs are always included by default
-    existing_ids = set(existing_items["ids"])
-    print(f"Number of existing documents in DB: {len(existing_ids)}")
+    # Only look up this file's chunk IDs, so the cost of an upload does not
+    # grow with the size of the collection
+    chunk_ids = [chunk.metadata["id"] for chunk in chunks_with_ids]
+    existing_ids = set()
+    for start in range(0, len(chunk_ids), ID_LOOKUP_BATCH_SIZE):
+        batch = chunk_ids[start : start + ID_LOOKUP_BATCH_SIZE]
+        existing_ids.update(db.get(ids=batch, include=[])["ids"])
+    print(f"Number of chunks already in DB: {len(existing_ids)}")
 
     # Only add documents that don't exist in the DB.
     new_chunks = []
@@ -218,9 +341,13 @@ def add_to_chroma(chunks: list[Document]):
 
     if len(new_chunks):
         print(f"👉 Adding new documents: {len(new_chunks)}")
-        new_chunk_ids = [chunk.metadata["id"] for chunk in new_chunks]
-        db.add_documents(new_chunks, ids=new_chunk_ids)
+        embed_and_store(db, new_chunks, db.embeddings, progress=progress)
         db.persist()
+        # Keep the lexical index in step with the vector store
+        update_bm25_index(
+            add_ids=[chunk.metadata["id"] for chunk in new_chunks],
+            add_texts=[chunk.page_content for chunk in new_chunks],
+        )
     else:
         print("✅ No new documents to add")
 
@@ -254,6 +381,9 @@ def calculate_chunk_ids(chunks):
 
 
 def clear_database():
+    # Release the shared handles before deleting the files underneath them
+    invalidate_chroma_db()
+    invalidate_bm25_index()
     if os.path.exists(CHROMA_PATH):
         retry_attempts = 5
         delay = 1  # seconds
@@ -266,6 +396,8 @@ def clear_database():
                 print(f"Attempt {attempt + 1}/{retry_attempts} failed: {e}")
                 time.sleep(delay)
                 # Close file handles using psutil
+                import psutil
+
                 for proc in psutil.process_iter(["pid", "name"]):
                     try:
                         for handle in proc.open_files():
@@ -277,11 +409,34 @@ def clear_database():
         print("Failed to clear the database after several attempts.")
 
 
+def delete_from_chroma(chunk_ids):
+    if not chunk_ids:
+        return
+    get_chroma_db().delete(ids=chunk_ids)
+    update_bm25_index(remove_ids=chunk_ids)
+
+
 def reload_chroma_db():
-    embedding_function = get_embedding_function()
-    chroma_db = Chroma(
-        persist_directory=CHROMA_PATH, embedding_function=embedding_function
-    )
-    num_documents = len(chroma_db.get(include=["documents"])["documents"])
+    invalidate_chroma_db()
+    chroma_db = get_chroma_db()
+    num_documents = count_documents()
     print(f"Number of documents in Chroma DB after reloading: {num_documents}")
+    ensure_bm25_index()
     return chroma_db
+
+
+# Function to get the BM25 index, backfilling it first when the store was
+# ingested before the index existed. add_to_chroma only indexes chunks that
+# are new to Chroma, so such a store would otherwise never be indexed.
+def ensure_bm25_index():
+    index = get_bm25_index()
+    if not len(index) and count_documents():
+        rebuild_bm25_index()
+    return index
+
+
+def rebuild_bm25_index():
+    found = get_chroma_db().get(include=["documents"])
+    print(f"Rebuilding BM25 index for {len(found['ids'])} chunks")
+    update_bm25_index(add_ids=found["ids"], add_texts=found["documents"])
+    save_bm25_index()
@@ -1,42 +1,36 @@
+import functools
 import json
-import google.generativeai as genai
-from openai import OpenAI
-from openai import AzureOpenAI
 
 import streamlit as st
 
+from src.llm_client import AZURE, GOOGLE, OPENAI, generate
+from src.threats import format_threats_for_prompt
+
+
+RENDER_CACHE_SIZE = 64
+
 
 def dread_json_to_markdown(dread_assessment):
-    markdown_output = "| Threat Type | Scenario | Damage Potential | Reproducibility | Exploitability | Affected Users | Discoverability | Risk Score |\n"
-    markdown_output += "|-------------|----------|------------------|-----------------|----------------|----------------|-----------------|-------------|\n"
     try:
         threats = dread_assessment.get("Risk Assessment", [])
-        for threat in threats:
-            if isinstance(threat, dict):
-                damage_potential = threat.get("Damage Potential", 0)
-                reproducibility = threat.get("Reproducibility", 0)
-                exploitability = threat.get("Exploitability", 0)
-                affected_users = threat.get("Affected Users", 0)
-                discoverability = threat.get("Discoverability", 0)
-
-                risk_score = (
-                    damage_potential
-                    + reproducibility
-                    + exploitability
-                    + affected_users
-                    + discoverability
-                ) / 5
-
-                markdown_output += f"| {threat.get('Threat Type', 'N/A')} | {threat.get('Scenario', 'N/A')} | {damage_potential} | {reproducibility} | {exploitability} | {affected_users} | {discoverability} | {risk_score:.2f} |\n"
-            else:
-                raise TypeError(f"Expected a dictionary, got {type(threat)}: {threat}")
+        return _render_dread(json.dumps(threats, sort_keys=True))
     except Exception as e:
         st.write(f"Error: {e}")
         raise
-    return markdown_output
+
+
+# Memoised on the assessment's content so reruns do not rebuild the table
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_dread(payload):
+    # Imported here so pandas is only loaded once a DREAD table is rendered
+    from src.dread_scoring import DreadAssessment
+
+    return DreadAssessment.from_threats(json.loads(payload)).to_markdown()
 
 
 def create_dread_assessment_prompt(threats):
+    # Compact table instead of the repr of a list of dicts
+    threats = format_threats_for_prompt(threats)
     prompt = f"""
 Act as a cyber security expert with more than 20 years of experience in threat modeling using STRIDE and DREAD methodologies.
 Your task is to produce a DREAD risk assessment for the threats identified in a threat model.
@@ -82,21 +76,10 @@ Ensure the JSON response is correctly formatted and does not contain any additio
 
 
 def get_dread_assessment(api_key, model_name, prompt):
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model=model_name,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant designed to output JSON.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
+    content = generate("dread", prompt, OPENAI, model_name, api_key)
 
     try:
-        dread_assessment = json.loads(response.choices[0].message.content)
+        dread_assessment = json.loads(content)
     except json.JSONDecodeError as e:
         st.write(f"JSON decoding error: {e}")
         dread_assessment = {}
@@ -107,26 +90,18 @@ def get_dread_assessment(api_key, model_name, prompt):
 def get_dread_assessment_azure(
     azure_api_endpoint, azure_api_key, azure_api_version, azure_deployment_name, prompt
 ):
-    client = AzureOpenAI(
-        azure_endpoint=azure_api_endpoint,
-        api_key=azure_api_key,
+    content = generate(
+        "dread",
+        prompt,
+        AZURE,
+        azure_deployment_name,
+        azure_api_key,
+        endpoint=azure_api_endpoint,
         api_version=azure_api_version,
     )
 
-    response = client.chat.completions.create(
-        model=azure_deployment_name,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant designed to output JSON.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-
     try:
-        dread_assessment = json.loads(response.choices[0].message.content)
+        dread_assessment = json.loads(content)
     except json.JSONDecodeError as e:
         st.write(f"JSON decoding error: {e}")
         dread_assessment = {}
@@ -135,17 +110,13 @@ def get_dread_assessment_azure(
 
 
 def get_dread_assessment_google(google_api_key, google_model, prompt):
-    genai.configure(api_key=google_api_key)
-    model = genai.GenerativeModel(
-        google_model, generation_config={"response_mime_type": "application/json"}
-    )
-    response = model.generate_content(prompt)
+    content = generate("dread", prompt, GOOGLE, google_model, google_api_key)
     try:
-        response_content = json.loads(response.candidates[0].content.parts[0].text)
+        response_content = json.loads(content)
     except json.JSONDecodeError as e:
         print(f"Error decoding JSON: {str(e)}")
         print("Raw JSON string:")
-        print(response.candidates[0].content.parts[0].text)
+        print(content)
         return None
 
     return response_content
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+DREAD_CATEGORIES = [
+    "Damage Potential",
+    "Reproducibility",
+    "Exploitability",
+    "Affected Users",
+    "Discoverability",
+]
+TEXT_COLUMNS = ["Threat Type", "Scenario"]
+# Threats are matched across assessments on their type and scenario
+THREAT_KEY = ["Application", *TEXT_COLUMNS]
+DEFAULT_WEIGHTS = {category: 1.0 for category in DREAD_CATEGORIES}
+
+
+# Columnar DREAD result. Category scores live in a pandas DataFrame (one row
+# per threat, float32 columns) so risk scores, rankings and aggregations are
+# single vectorised operations even across thousands of threats. The risk
+# score is the weighted mean of the five categories; equal weights give the
+# classic DREAD average.
+class DreadAssessment:
+    __slots__ = ("frame", "weights")
+
+    def __init__(self, frame, weights=None):
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.frame = frame
+        self._score()
+
+    @classmethod
+    def from_threats(cls, threats, weights=None, application=""):
+        for threat in threats:
+            if not isinstance(threat, dict):
+                raise TypeError(f"Expected a dictionary, got {type(threat)}: {threat}")
+
+        frame = pd.DataFrame.from_records(
+            threats, columns=[*TEXT_COLUMNS, *DREAD_CATEGORIES]
+        )
+        frame[TEXT_COLUMNS] = frame[TEXT_COLUMNS].fillna("N/A").astype(str)
+        frame[DREAD_CATEGORIES] = (
+            frame[DREAD_CATEGORIES]
+            .apply(pd.to_numeric, errors="coerce")
+            .fillna(0)
+            .astype(np.float32)
+        )
+        frame.insert(0, "Application", application)
+        return cls(frame, weights)
+
+    # Accepts the model's JSON ({"Risk Assessment": [...]}) or the bare list
+    @classmethod
+    def from_json(cls, dread_assessment, weights=None, application=""):
+        if isinstance(dread_assessment, dict):
+            dread_assessment = dread_assessment.get("Risk Assessment", [])
+        return cls.from_threats(dread_assessment or [], weights, application)
+
+    # Function to combine assessments, e.g. one per application across a
+    # portfolio, into a single assessment
+    @classmethod
+    def concat(cls, assessments, weights=None):
+        frames = [assessment.frame for assessment in assessments]
+        if not frames:
+            return cls.from_threats([], weights)
+        return cls(pd.concat(frames, ignore_index=True), weights)
+
+    def _score(self):
+        weights = np.array(
+            [self.weights[category] for category in DREAD_CATEGORIES],
+            dtype=np.float32,
+        )
+        scores = self.frame[DREAD_CATEGORIES].to_numpy(dtype=np.float32)
+        total = weights.sum()
+        self.frame["Risk Score"] = scores @ weights / total if total else 0.0
+
+    def with_weights(self, weights):
+        return DreadAssessment(self.frame.copy(), weights)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def ranked(self):
+        # Stable sort so threats with equal scores keep the model's order
+        return self.frame.sort_values("Risk Score", ascending=False, kind="mergesort")
+
+    def top(self, n=10):
+        return self.ranked().head(n)
+
+    # Function to aggregate risk per STRIDE category (the threat type)
+    def by_category(self):
+        grouped = self.frame.groupby("Threat Type")["Risk Score"]
+        summary = grouped.agg(
+            Threats="count", Mean="mean", Max="max", Total="sum"
+        ).reset_index()
+        return summary.sort_values("Max", ascending=False, kind="mergesort")
+
+    # Function to compare this assessment with an earlier one. Returns one row
+    # per threat with both risk scores, the change, and whether the threat was
+    # added, removed or re-scored.
+    def compare(self, previous):
+        current = self.frame[[*THREAT_KEY, "Risk Score"]]
+        before = previous.frame[[*THREAT_KEY, "Risk Score"]]
+        merged = current.merge(
+            before, on=THREAT_KEY, how="outer", suffixes=("", " Before")
+        )
+        merged["Delta"] = merged["Risk Score"].fillna(0) - merged[
+            "Risk Score Before"
+        ].fillna(0)
+        merged["Status"] = np.select(
+            [
+                merged["Risk Score Before"].isna(),
+                merged["Risk Score"].isna(),
+                merged["Delta"] != 0,
+            ],
+            ["added", "removed", "changed"],
+            default="unchanged",
+        )
+        return merged.sort_values("Delta", key=np.abs, ascending=False)
+
+    def to_markdown(self):
+        lines = [
+            "| Threat Type | Scenario | Damage Potential | Reproducibility | Exploitability | Affected Users | Discoverability | Risk Score |",
+            "|-------------|----------|------------------|-----------------|----------------|----------------|-----------------|-------------|",
+        ]
+        columns = [*TEXT_COLUMNS, *DREAD_CATEGORIES, "Risk Score"]
+        for row in self.ranked()[columns].itertuples(index=False):
+            threat_type, scenario, *categories, risk_score = row
+            values = " | ".join(f"{value:g}" for value in categories)
+            lines.append(
+                f"| {threat_type} | {scenario} | {values} | {risk_score:.2f} |"
+            )
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,115 @@
+import hashlib
+import os
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.response_cache import CACHE_DIR
+from src.singleton import Singleton
+from src.sqlite_store import SQLiteStore
+
+EMBEDDING_CACHE_PATH = os.path.join(CACHE_DIR, "embeddings.sqlite3")
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Local store of embeddings keyed by (model name, sha256 of the text). Vectors
+# are kept as raw float32 bytes so lookups cost a single indexed query.
+class EmbeddingCache(SQLiteStore):
+    schema = (
+        """
+        CREATE TABLE IF NOT EXISTS embeddings (
+            model TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            PRIMARY KEY (model, text_hash)
+        )
+        """,
+    )
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH):
+        super().__init__(path)
+
+    def get_many(self, model, text_hashes):
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(text_hashes), 500):
+                batch = text_hashes[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    (model, *batch),
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[text_hash] = np.frombuffer(vector, dtype=np.float32).tolist()
+        return found
+
+    def set_many(self, model, items):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) "
+                "VALUES (?, ?, ?)",
+                [
+                    (model, text_hash, np.asarray(vector, dtype=np.float32).tobytes())
+                    for text_hash, vector in items
+                ],
+            )
+            self._conn.commit()
+
+
+_embedding_cache = Singleton(EmbeddingCache)
+
+
+def get_embedding_cache():
+    return _embedding_cache.get()
+
+
+# Embeddings wrapper that consults the local cache first and only sends
+# unseen text to the underlying embedding model
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embeddings, model_name, cache=None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or get_embedding_cache()
+
+    def uncached(self, texts: List[str]) -> List[str]:
+        text_hashes = [hash_text(text) for text in texts]
+        cached = self.cache.get_many(self.model_name, list(set(text_hashes)))
+        return [
+            text
+            for text_hash, text in zip(text_hashes, texts)
+            if text_hash not in cached
+        ]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        text_hashes = [hash_text(text) for text in texts]
+        cached = self.cache.get_many(self.model_name, list(set(text_hashes)))
+
+        # Embed each distinct missing text once, even if it repeats
+        missing = {}
+        for text_hash, text in zip(text_hashes, texts):
+            if text_hash not in cached and text_hash not in missing:
+                missing[text_hash] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = list(zip(missing.keys(), vectors))
+            self.cache.set_many(self.model_name, new_items)
+            cached.update(new_items)
+
+        return [cached[text_hash] for text_hash in text_hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        text_hash = hash_text(text)
+        cached = self.cache.get_many(self.model_name, [text_hash])
+        if text_hash in cached:
+            return cached[text_hash]
+
+        vector = self.embeddings.embed_query(text)
+        self.cache.set_many(self.model_name, [(text_hash, vector)])
+        return vector
@@ -0,0 +1,127 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import tiktoken
+from dotenv import load_dotenv
+
+from src.embedding_cache import CachedEmbeddings
+from src.rate_limiter import TokenRateLimiter
+
+load_dotenv()
+
+EMBEDDING_TOKENS_PER_MINUTE = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", 1_000_000))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", 4))
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", 100_000))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 500))
+EMBEDDING_MAX_RETRIES = 6
+
+_encoding = tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text):
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+# Function to group chunks into batches bounded by a token budget and size
+def batch_by_tokens(
+    chunks, max_tokens=EMBEDDING_BATCH_TOKENS, max_size=EMBEDDING_BATCH_SIZE
+):
+    batches = []
+    batch, batch_tokens = [], 0
+    for chunk in chunks:
+        tokens = count_tokens(chunk.page_content)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_size):
+            batches.append((batch, batch_tokens))
+            batch, batch_tokens = [], 0
+        batch.append(chunk)
+        batch_tokens += tokens
+    if batch:
+        batches.append((batch, batch_tokens))
+    return batches
+
+
+def _is_rate_limited(error):
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return "rate limit" in str(error).lower() or "429" in str(error)
+
+
+def _embed_with_backoff(embedding_function, texts):
+    for attempt in range(EMBEDDING_MAX_RETRIES):
+        try:
+            return embedding_function.embed_documents(texts)
+        except Exception as e:
+            if not _is_rate_limited(e) or attempt == EMBEDDING_MAX_RETRIES - 1:
+                raise
+            delay = min(60, 2**attempt) + random.uniform(0, 1)
+            print(f"⏳ Rate limited, retrying embedding batch in {delay:.1f}s")
+            time.sleep(delay)
+
+
+# Function to embed chunks in concurrent, rate-limited batches and write each
+# batch to Chroma as soon as it is embedded. Every stored batch acts as a
+# checkpoint: add_to_chroma skips IDs that already exist, so an interrupted
+# ingest resumes from the batches that were not yet written.
+def embed_and_store(
+    db,
+    chunks,
+    embedding_function,
+    tokens_per_minute=EMBEDDING_TOKENS_PER_MINUTE,
+    concurrency=EMBEDDING_CONCURRENCY,
+    progress=None,
+):
+    batches = batch_by_tokens(chunks)
+    limiter = TokenRateLimiter(tokens_per_minute)
+    write_lock = threading.Lock()
+    total_tokens = sum(batch_tokens for _batch, batch_tokens in batches)
+
+    def embed_batch(batch, batch_tokens):
+        texts = [chunk.page_content for chunk in batch]
+        # Cached embeddings cost no API quota, so only meter what gets sent
+        if isinstance(embedding_function, CachedEmbeddings):
+            batch_tokens = sum(
+                count_tokens(text) for text in embedding_function.uncached(texts)
+            )
+        if batch_tokens:
+            limiter.acquire(batch_tokens)
+        embeddings = _embed_with_backoff(embedding_function, texts)
+        with write_lock:
+            db._collection.upsert(
+                ids=[chunk.metadata["id"] for chunk in batch],
+                embeddings=embeddings,
+                metadatas=[chunk.metadata for chunk in batch],
+                documents=texts,
+            )
+        return len(batch)
+
+    start = time.perf_counter()
+    stored = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(embed_batch, batch, batch_tokens)
+            for batch, batch_tokens in batches
+        ]
+        for future in as_completed(futures):
+            stored += future.result()
+            print(f"📦 Embedded {stored}/{len(chunks)} chunks")
+            if progress is not None:
+                progress(stored, len(chunks))
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    stats = {
+        "chunks": stored,
+        "batches": len(batches),
+        "tokens": total_tokens,
+        "seconds": round(elapsed, 3),
+        "chunks_per_second": round(stored / elapsed, 2),
+        "tokens_per_second": round(total_tokens / elapsed, 2),
+    }
+    print(
+        f"⚡ Embedded {stats['chunks']} chunks ({stats['tokens']} tokens) in "
+        f"{stats['seconds']}s: {stats['chunks_per_second']} chunks/s, "
+        f"{stats['tokens_per_second']} tokens/s"
+    )
+    return stats
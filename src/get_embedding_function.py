@@ -2,13 +2,17 @@ import os
 from dotenv import load_dotenv
 from langchain_community.embeddings import OpenAIEmbeddings
 
+from src.embedding_cache import CachedEmbeddings
+
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+EMBEDDING_MODEL = "text-embedding-3-small"
 
 
 def get_embedding_function():
     embedding_function = OpenAIEmbeddings(
-        openai_api_key=OPENAI_API_KEY, model="text-embedding-3-small"
+        openai_api_key=OPENAI_API_KEY, model=EMBEDDING_MODEL
     )
-    return embedding_function
+    # Unchanged text is served from the local embedding cache
+    return CachedEmbeddings(embedding_function, EMBEDDING_MODEL)
@@ -0,0 +1,84 @@
+import base64
+import hashlib
+import io
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from src.singleton import Singleton
+
+# OpenAI vision models fit high-detail images within 2048x2048 and then scale
+# the short side down to 768px, so anything larger is wasted upload
+MAX_LONG_SIDE = 2048
+MAX_SHORT_SIDE = 768
+JPEG_QUALITY = 85
+
+# (connect, read) timeouts in seconds; vision responses can take a while
+REQUEST_TIMEOUT = (10, 120)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def hash_image(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+# Function to downscale an uploaded image to the model's effective resolution
+# and re-encode it. Photos stay JPEG; diagrams and screenshots are kept as PNG
+# so thin lines and labels survive. Returns the base64 payload and MIME type.
+def preprocess_image(image_bytes):
+    from PIL import Image
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image_format = image.format
+        scale = min(
+            1.0,
+            MAX_LONG_SIDE / max(image.size),
+            MAX_SHORT_SIDE / min(image.size),
+        )
+        if scale < 1.0:
+            size = (
+                max(1, round(image.width * scale)),
+                max(1, round(image.height * scale)),
+            )
+            image = image.resize(size, Image.LANCZOS)
+
+        output = io.BytesIO()
+        if image_format == "JPEG":
+            image.convert("RGB").save(
+                output, format="JPEG", quality=JPEG_QUALITY, optimize=True
+            )
+            mime_type = "image/jpeg"
+        else:
+            if image.mode not in ("RGB", "RGBA", "L", "LA"):
+                image = image.convert("RGBA")
+            image.save(output, format="PNG", optimize=True)
+            mime_type = "image/png"
+
+    return base64.b64encode(output.getvalue()).decode("utf-8"), mime_type
+
+
+# Function to build a pooled HTTP session that retries throttled and
+# transient failures with exponential backoff
+def _create_http_session():
+    retry = Retry(
+        total=3,
+        backoff_factor=1,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=8),
+    )
+    return session
+
+
+_http_session = Singleton(_create_http_session)
+
+
+def get_http_session():
+    return _http_session.get()
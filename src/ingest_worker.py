@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.singleton import Singleton
+
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", 2))
+PARSE_PROCESSES = int(os.getenv("INGEST_PARSE_PROCESSES", os.cpu_count() or 1))
+# Finished jobs are forgotten after this many seconds
+JOB_RETENTION = int(os.getenv("INGEST_JOB_RETENTION", 600))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class IngestJob:
+    def __init__(self, file_path):
+        self.id = uuid.uuid4().hex
+        self.file_path = file_path
+        self.name = os.path.basename(file_path)
+        self.status = QUEUED
+        self.stage = QUEUED
+        self.progress = 0.0
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    def update(self, stage, fraction):
+        self.stage = stage
+        self.progress = max(self.progress, min(fraction, 1.0))
+
+    @property
+    def active(self):
+        return self.status not in (DONE, FAILED)
+
+
+# Background ingestion worker. Jobs run on a small thread pool so several
+# uploads are processed concurrently, while PDF and CSV parsing is pushed to
+# a process pool so it uses every core instead of contending for the GIL.
+class IngestWorker:
+    def __init__(
+        self, concurrency=INGEST_CONCURRENCY, parse_processes=PARSE_PROCESSES
+    ):
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="ingest"
+        )
+        # spawn avoids forking the multi-threaded Streamlit server process
+        self._parse_pool = ProcessPoolExecutor(
+            max_workers=parse_processes,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _parse(self, file_path):
+        from src.db_ops import load_file_documents
+
+        return self._parse_pool.submit(load_file_documents, file_path).result()
+
+    def _run(self, job):
+        # db_ops pulls in LangChain and Chroma, so it is only loaded once a
+        # document is actually ingested
+        from src.db_ops import ingest_and_record
+
+        job.status = RUNNING
+        try:
+            ingest_and_record(
+                job.file_path, progress=job.update, load_documents=self._parse
+            )
+            job.status = DONE
+            job.update(DONE, 1.0)
+        except Exception as e:
+            print(f"Ingestion of {job.file_path} failed: {e}")
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION
+        expired = [
+            job.id
+            for job in self._jobs.values()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, file_path):
+        job = IngestJob(file_path)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        return job
+
+    def submit_upload(self, uploaded_file):
+        from src.db_ops import save_uploaded_file
+
+        file_path = save_uploaded_file(uploaded_file)
+        if file_path is None:
+            return None
+        return self.submit(file_path)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    # Jobs are shared by every session, so callers pass the ids they submitted
+    def jobs(self, job_ids=None):
+        with self._lock:
+            self._prune()
+            if job_ids is None:
+                jobs = list(self._jobs.values())
+            else:
+                jobs = [self._jobs[i] for i in job_ids if i in self._jobs]
+        return sorted(jobs, key=lambda job: job.submitted_at)
+
+
+_worker = Singleton(IngestWorker)
+
+
+# Function to get the ingestion worker shared by every session
+def get_ingest_worker():
+    return _worker.get()
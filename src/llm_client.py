@@ -0,0 +1,309 @@
+import hashlib
+import json
+import threading
+
+import httpx
+
+from src.response_cache import get_response_cache, make_cache_key
+from src.threats import ThreatModel
+
+OPENAI = "openai"
+AZURE = "azure"
+GOOGLE = "google"
+
+# Map the provider labels shown in the UI to the provider ids used here
+PROVIDER_LABELS = {
+    "OpenAI API": OPENAI,
+    "Azure OpenAI Service": AZURE,
+    "Google AI API": GOOGLE,
+}
+
+AZURE_API_VERSION = "2023-12-01-preview"
+
+JSON_SYSTEM_PROMPT = "You are a helpful assistant designed to output JSON."
+
+ATTACK_TREE_SYSTEM_PROMPT = """
+Act as a cyber security expert with more than 20 years experience of using the STRIDE threat modelling methodology to produce comprehensive threat models for a wide range of applications. Your task is to use the application description provided to you to produce an attack tree in Mermaid syntax. The attack tree should reflect the potential threats for the application based on the details given.
+
+You MUST only respond with the Mermaid code block. See below for a simple example of the required format and syntax for your output.
+
+```mermaid
+graph TD
+    A[Enter Chart Definition] --> B(Preview)
+    B --> C{{decide}}
+    C --> D["Keep"]
+    C --> E["Edit Definition (Edit)"]
+    E --> B
+    D --> F["Save Image and Code"]
+    F --> B
+```
+
+IMPORTANT: Round brackets are special characters in Mermaid syntax. If you want to use round brackets inside a node label you MUST wrap the label in double quotes. For example, ["Example Node Label (ENL)"].
+"""
+
+# System prompt and output mode for each kind of generation. Bump "version"
+# whenever a prompt template changes so stale cached responses are not reused.
+# "validate", if set, raises ValueError for a response the caller would
+# reject; such responses are never cached or served from the cache.
+GENERATION_KINDS = {
+    "threat_model": {
+        "system": JSON_SYSTEM_PROMPT,
+        "json": True,
+        "version": 1,
+        "validate": ThreatModel.parse,
+    },
+    "dread": {"system": JSON_SYSTEM_PROMPT, "json": True, "version": 1},
+    "mitigations": {
+        "system": "You are a helpful assistant that provides threat mitigation strategies in Markdown format.",
+        "json": False,
+        "version": 1,
+    },
+    "test_cases": {
+        "system": "You are a helpful assistant that provides Gherkin test cases in Markdown format.",
+        "json": False,
+        "version": 1,
+    },
+    "attack_tree": {"system": ATTACK_TREE_SYSTEM_PROMPT, "json": False, "version": 1},
+}
+
+# Connection pool settings shared by every provider client
+POOL_LIMITS = httpx.Limits(
+    max_connections=50, max_keepalive_connections=20, keepalive_expiry=120
+)
+REQUEST_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+_clients = {}
+_clients_lock = threading.Lock()
+_google_lock = threading.Lock()
+_google_configured_key = None
+
+
+def _registry_key(provider, endpoint, api_key, api_version=None):
+    # Never keep raw API keys around as dictionary keys
+    key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    # Same default as _build_client, so callers that omit the version share
+    # the client built for callers that pass it
+    if provider == AZURE:
+        api_version = api_version or AZURE_API_VERSION
+    return (provider, endpoint or "", key_digest, api_version or "")
+
+
+def _build_client(provider, endpoint, api_key, api_version):
+    http_client = httpx.Client(limits=POOL_LIMITS, timeout=REQUEST_TIMEOUT)
+    if provider == OPENAI:
+        from openai import OpenAI
+
+        return OpenAI(api_key=api_key, http_client=http_client)
+    if provider == AZURE:
+        from openai import AzureOpenAI
+
+        return AzureOpenAI(
+            azure_endpoint=endpoint,
+            api_key=api_key,
+            api_version=api_version or AZURE_API_VERSION,
+            http_client=http_client,
+        )
+    raise ValueError(f"Unsupported provider: {provider}")
+
+
+# Function to get a warm, pooled client for a provider. Clients live for the
+# lifetime of the process so connections survive Streamlit reruns and are
+# shared by every session using the same credentials.
+def get_client(provider, api_key, endpoint=None, api_version=None):
+    registry_key = _registry_key(provider, endpoint, api_key, api_version)
+    client = _clients.get(registry_key)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(registry_key)
+        if client is None:
+            client = _build_client(provider, endpoint, api_key, api_version)
+            _clients[registry_key] = client
+    return client
+
+
+# genai.configure sets one API key for the whole process, so callers must
+# hold _google_lock from here until their request has completed; otherwise a
+# concurrent session could reconfigure the key mid-call. Gemini requests are
+# therefore serialised rather than shared across sessions like the pooled
+# OpenAI and Azure clients.
+def _get_google_model(api_key, model_name, system_prompt, json_mode):
+    global _google_configured_key
+    import google.generativeai as genai
+
+    # genai.configure rebuilds the underlying transport, so only do it when
+    # the key actually changes
+    if _google_configured_key != api_key:
+        genai.configure(api_key=api_key)
+        _google_configured_key = api_key
+
+    generation_config = (
+        {"response_mime_type": "application/json"} if json_mode else None
+    )
+    # Gemini's JSON mode is used without a system instruction, matching the
+    # original threat model and DREAD calls
+    system_instruction = None if json_mode else system_prompt
+    return genai.GenerativeModel(
+        model_name,
+        generation_config=generation_config,
+        system_instruction=system_instruction,
+    )
+
+
+def _is_cacheable(settings, content):
+    if not content:
+        return False
+    validate = settings.get("validate")
+    if validate is None and not settings["json"]:
+        return True
+    # Never cache output the caller will reject, otherwise retries would keep
+    # replaying it
+    try:
+        if validate is not None:
+            validate(content)
+        else:
+            json.loads(content)
+    except ValueError:
+        return False
+    return True
+
+
+def _build_request(settings, prompt, model, max_tokens):
+    request = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": settings["system"]},
+            {"role": "user", "content": prompt},
+        ],
+    }
+    if settings["json"]:
+        request["response_format"] = {"type": "json_object"}
+    if max_tokens:
+        request["max_tokens"] = max_tokens
+    return request
+
+
+def _cache_key(kind, settings, prompt, provider, endpoint, model, max_tokens):
+    return make_cache_key(
+        kind, settings["version"], prompt, provider, endpoint, model, max_tokens
+    )
+
+
+def _complete(
+    settings, prompt, provider, model, api_key, endpoint, api_version, max_tokens
+):
+    if provider == GOOGLE:
+        with _google_lock:
+            google_model = _get_google_model(
+                api_key, model, settings["system"], settings["json"]
+            )
+            response = google_model.generate_content(prompt)
+            return response.candidates[0].content.parts[0].text
+
+    client = get_client(provider, api_key, endpoint=endpoint, api_version=api_version)
+    response = client.chat.completions.create(
+        **_build_request(settings, prompt, model, max_tokens)
+    )
+    return response.choices[0].message.content
+
+
+def _stream(
+    settings, prompt, provider, model, api_key, endpoint, api_version, max_tokens
+):
+    if provider == GOOGLE:
+        # Held until the stream is exhausted or closed, since chunks are
+        # fetched with the key configured when the request was made
+        with _google_lock:
+            google_model = _get_google_model(
+                api_key, model, settings["system"], settings["json"]
+            )
+            for chunk in google_model.generate_content(prompt, stream=True):
+                if chunk.parts:
+                    yield chunk.text
+        return
+
+    client = get_client(provider, api_key, endpoint=endpoint, api_version=api_version)
+    response = client.chat.completions.create(
+        **_build_request(settings, prompt, model, max_tokens), stream=True
+    )
+    for chunk in response:
+        # Azure sends content filter results as chunks without choices
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+# Function to generate a completion for the given kind of output. This is the
+# single entry point used by every generator in src/. Identical requests are
+# answered from the shared on-disk response cache.
+def generate(
+    kind,
+    prompt,
+    provider,
+    model,
+    api_key,
+    endpoint=None,
+    api_version=None,
+    max_tokens=None,
+    use_cache=True,
+):
+    settings = GENERATION_KINDS[kind]
+
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        cache_key = _cache_key(
+            kind, settings, prompt, provider, endpoint, model, max_tokens
+        )
+        cached = cache.get(cache_key)
+        # Re-checked so entries cached before validation was tightened are
+        # regenerated instead of replayed
+        if cached is not None and _is_cacheable(settings, cached):
+            return cached
+
+    content = _complete(
+        settings, prompt, provider, model, api_key, endpoint, api_version, max_tokens
+    )
+
+    if cache is not None and _is_cacheable(settings, content):
+        cache.set(cache_key, content)
+    return content
+
+
+# Function to stream a completion as text chunks. Shares the response cache
+# with generate(): a cached response is yielded in one piece and a streamed
+# response is cached once it has been fully received.
+def stream_generate(
+    kind,
+    prompt,
+    provider,
+    model,
+    api_key,
+    endpoint=None,
+    api_version=None,
+    max_tokens=None,
+    use_cache=True,
+):
+    settings = GENERATION_KINDS[kind]
+
+    cache = get_response_cache() if use_cache else None
+    if cache is not None:
+        cache_key = _cache_key(
+            kind, settings, prompt, provider, endpoint, model, max_tokens
+        )
+        cached = cache.get(cache_key)
+        # Re-checked so entries cached before validation was tightened are
+        # regenerated instead of replayed
+        if cached is not None and _is_cacheable(settings, cached):
+            yield cached
+            return
+
+    chunks = []
+    for chunk in _stream(
+        settings, prompt, provider, model, api_key, endpoint, api_version, max_tokens
+    ):
+        chunks.append(chunk)
+        yield chunk
+
+    content = "".join(chunks)
+    if cache is not None and _is_cacheable(settings, content):
+        cache.set(cache_key, content)
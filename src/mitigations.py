@@ -1,10 +1,11 @@
-import google.generativeai as genai
-from openai import OpenAI
-from openai import AzureOpenAI
+from src.llm_client import GOOGLE, stream_generate
+from src.threats import format_threats_for_prompt
 
 
 # Function to create a prompt to generate mitigating controls
 def create_mitigations_prompt(threats):
+    # Compact table instead of the repr of a list of dicts
+    threats = format_threats_for_prompt(threats)
     prompt = f"""
 Act as a cyber security expert with more than 20 years experience of using the STRIDE threat modelling methodology. Your task is to provide potential mitigations for the threats identified in the threat model. It is very important that your responses are tailored to reflect the details of the threats.
 
@@ -21,71 +22,23 @@ YOUR RESPONSE (do not wrap in a code block):
     return prompt
 
 
-# Function to get mitigations from the GPT response.
-def get_mitigations(api_key, model_name, prompt):
-    client = OpenAI(api_key=api_key)
-
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant that provides threat mitigation strategies in Markdown format.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-
-    # Access the content directly as the response will be in text format
-    mitigations = response.choices[0].message.content
-
-    return mitigations
-
-
-# Function to get mitigations from the Azure OpenAI response.
-def get_mitigations_azure(
-    azure_api_endpoint, azure_api_key, azure_api_version, azure_deployment_name, prompt
-):
-    client = AzureOpenAI(
-        azure_endpoint=azure_api_endpoint,
-        api_key=azure_api_key,
-        api_version=azure_api_version,
-    )
-
-    response = client.chat.completions.create(
-        model=azure_deployment_name,
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant that provides threat mitigation strategies in Markdown format.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-
-    # Access the content directly as the response will be in text format
-    mitigations = response.choices[0].message.content
-
-    return mitigations
-
-
-# Function to get mitigations from the Google model's response.
-def get_mitigations_google(google_api_key, google_model, prompt):
-    genai.configure(api_key=google_api_key)
-    model = genai.GenerativeModel(
-        google_model,
-        system_instruction="You are a helpful assistant that provides threat mitigation strategies in Markdown format.",
-    )
-    response = model.generate_content(prompt)
-    try:
-        # Extract the text content from the 'candidates' attribute
-        mitigations = response.candidates[0].content.parts[0].text
-        # Replace '\n' with actual newline characters
-        mitigations = mitigations.replace("\\n", "\n")
-    except (IndexError, AttributeError) as e:
-        print(f"Error accessing response content: {str(e)}")
-        print("Raw response:")
-        print(response)
-        return None
-
-    return mitigations
+# Function to stream mitigations as Markdown chunks for st.write_stream.
+# settings holds the generate() provider arguments.
+def stream_mitigations(settings, prompt):
+    chunks = stream_generate("mitigations", prompt, **settings)
+    if settings["provider"] != GOOGLE:
+        yield from chunks
+        return
+
+    # Gemini escapes newlines as a literal "\\n", which can be split across
+    # two chunks, so a trailing backslash waits for the next chunk
+    pending = ""
+    for chunk in chunks:
+        text = pending + chunk
+        pending = ""
+        if text.endswith("\\"):
+            text, pending = text[:-1], "\\"
+        if text:
+            yield text.replace("\\n", "\n")
+    if pending:
+        yield pending
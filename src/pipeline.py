@@ -0,0 +1,116 @@
+import json
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.attack_tree import strip_mermaid_fences
+from src.dread import create_dread_assessment_prompt
+from src.llm_client import GOOGLE, generate
+from src.mitigations import create_mitigations_prompt
+from src.test_cases import create_test_cases_prompt
+from src.threats import ThreatModel
+
+MAX_RETRIES = 3
+
+
+def _with_retries(func, *args, rate_limiter=None):
+    for attempt in range(MAX_RETRIES):
+        # Every attempt is a model call, so retries are metered too
+        if rate_limiter is not None:
+            rate_limiter.acquire(1)
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1:
+                raise
+            print(f"{func.__name__} failed ({e}), retrying {attempt + 2}/{MAX_RETRIES}")
+
+
+def _threat_model(settings, prompt):
+    text = generate("threat_model", prompt, **settings, max_tokens=4000)
+    # Validated here so malformed threats fail the stage and are retried
+    return ThreatModel.parse(text).to_dict()
+
+
+def _attack_tree(settings, prompt):
+    return strip_mermaid_fences(generate("attack_tree", prompt, **settings))
+
+
+def _mitigations(settings, threats):
+    return generate("mitigations", create_mitigations_prompt(threats), **settings)
+
+
+def _dread_assessment(settings, threats):
+    prompt = create_dread_assessment_prompt(threats)
+    return json.loads(generate("dread", prompt, **settings))
+
+
+def _test_cases(settings, threats):
+    return generate("test_cases", create_test_cases_prompt(threats), **settings)
+
+
+# Stages that only depend on the threats produced by the threat model
+THREAT_STAGES = {
+    "mitigations": _mitigations,
+    "dread_assessment": _dread_assessment,
+    "test_cases": _test_cases,
+}
+
+
+# Function to generate every artifact for an application concurrently.
+# The attack tree only needs the application description so it starts right
+# away alongside the threat model; mitigations, DREAD and test cases fan out
+# as soon as the threat model lands. Yields (name, result, error) tuples in
+# completion order so callers can publish each result as it arrives.
+#
+# settings holds the generate() provider arguments: provider, model, api_key
+# and, for Azure, endpoint and api_version. An optional rate_limiter with an
+# acquire(n) method (such as a TokenRateLimiter counting requests) is
+# consulted before every model call.
+def run_pipeline(
+    settings, threat_model_prompt, attack_tree_prompt=None, rate_limiter=None
+):
+    with ThreadPoolExecutor(max_workers=1 + len(THREAT_STAGES)) as executor:
+        pending = {
+            executor.submit(
+                _with_retries,
+                _threat_model,
+                settings,
+                threat_model_prompt,
+                rate_limiter=rate_limiter,
+            ): "threat_model"
+        }
+        # Google's safety filters prevent reliable attack tree generation
+        if attack_tree_prompt and settings["provider"] != GOOGLE:
+            future = executor.submit(
+                _with_retries,
+                _attack_tree,
+                settings,
+                attack_tree_prompt,
+                rate_limiter=rate_limiter,
+            )
+            pending[future] = "attack_tree"
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield name, None, e
+                    continue
+
+                yield name, result, None
+
+                if name == "threat_model":
+                    threats = result.get("threat_model", [])
+                    if not threats:
+                        continue
+                    for stage_name, stage in THREAT_STAGES.items():
+                        future = executor.submit(
+                            _with_retries,
+                            stage,
+                            settings,
+                            threats,
+                            rate_limiter=rate_limiter,
+                        )
+                        pending[future] = stage_name
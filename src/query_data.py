@@ -2,17 +2,37 @@ import os
 import argparse
 from dotenv import load_dotenv
 from langchain.prompts import ChatPromptTemplate
-from langchain_community.vectorstores import Chroma
+from langchain_core.messages import AIMessage
 from langchain_openai import ChatOpenAI
 
-from src.db_ops import reload_chroma_db
+from src.context_packer import fit_artifacts, pack_context
+from src.db_ops import count_documents, reload_chroma_db
 from src.get_embedding_function import get_embedding_function
+from src.retrieval import hybrid_search
+from src.semantic_cache import (
+    SEMANTIC_CACHE_ENABLED,
+    fingerprint_session,
+    get_semantic_cache,
+)
 
 
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# Fused retrieval ranks precisely enough that only the top few chunks are sent
+CONTEXT_CHUNKS = 5
+
+# Session fields that are fitted into the artifact token budget
+SESSION_ARTIFACTS = [
+    "image_analysis_content",
+    "attack_tree",
+    "threat_model",
+    "mitigations",
+    "dread_assessment",
+    "test_cases",
+]
+
 
 PROMPT_TEMPLATE = """
 Bolt is a large language model trained by Adversys.
@@ -52,6 +72,9 @@ DREAD Assessment:
 Test Cases:
 {test_cases}
 
+Relevant excerpts from the uploaded documents:
+{context}
+
 ---
 
 Answer the question based on the above context: {question}
@@ -60,12 +83,112 @@ If you do not have any context or context relevant to the question they are aski
 """
 
 
-def setup_chroma_db():
-    embedding_function = get_embedding_function()
-    chroma_db = Chroma(
-        persist_directory="chroma", embedding_function=embedding_function
+def build_rag_prompt(
+    query_text: str,
+    chat_history: str,
+    session_data: str,
+    fetch_context: bool,
+):
+    documents = []
+    if fetch_context:
+        # Dense and BM25 results are fused and reranked, then the packer
+        # keeps the best chunks that fit the token budget
+        results, _timings = hybrid_search(query_text)
+        context_text, documents = pack_context(results[:CONTEXT_CHUNKS])
+
+        # Print the context for debugging
+        print("Context being added to the prompt:")
+        print(context_text)
+    else:
+        # No context needed
+        context_text = ""
+
+    artifacts = fit_artifacts(
+        {name: session_data[name] for name in SESSION_ARTIFACTS}
+    )
+
+    prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
+
+    prompt = prompt_template.format(
+        app_type=session_data["app_type"],
+        sensitive_data=session_data["sensitive_data"],
+        internet_facing=session_data["internet_facing"],
+        authentication=session_data["authentication"],
+        **artifacts,
+        context=context_text or "None",
+        question=query_text,
+        chat_history=chat_history,
+    )
+    return prompt, documents
+
+
+# Function to look a question up in the semantic answer cache. Returns the
+# cached answer (or None) and a callback that stores a freshly generated one.
+def lookup_cached_answer(query_text, session_data, fetch_context, chat_history=""):
+    cache = get_semantic_cache()
+    # The UI appends the question being asked to the history; only the turns
+    # before it decide whether an earlier answer still applies
+    conversation = (chat_history or "").removesuffix(f"User: {query_text}\n")
+    fingerprint = fingerprint_session(
+        session_data, count_documents() if fetch_context else 0, conversation.strip()
     )
-    return chroma_db
+    # The embedding cache makes the retrieval step's own embedding free
+    vector = get_embedding_function().embed_query(query_text)
+    answer = cache.get(fingerprint, vector)
+
+    def store(new_answer):
+        if new_answer:
+            cache.set(fingerprint, query_text, vector, new_answer)
+
+    return answer, store
+
+
+# Function to turn a failed model call into the message shown in the chat
+def describe_error(e):
+    print(f"An error occurred: {e}")
+    if isinstance(e, ValueError) and "AccessDeniedException" in str(e):
+        return "Access denied. Please check your credentials and model permissions."
+    return f"An unexpected error occurred: {e}"
+
+
+def format_sources(documents):
+    if documents:
+        return [doc.metadata.get("id", None) for doc in documents]
+    return None
+
+
+# Function to answer a question in one call. Unlike query_rag, errors are
+# raised so callers such as the batch CLI can tell them apart from answers.
+def answer_rag(
+    query_text: str,
+    chat_history: str,
+    session_data: str,
+    fetch_context: bool,
+    use_cache: bool = SEMANTIC_CACHE_ENABLED,
+):
+    if use_cache:
+        cached_answer, store_answer = lookup_cached_answer(
+            query_text, session_data, fetch_context, chat_history
+        )
+        if cached_answer is not None:
+            print("Answered from the semantic cache")
+            return AIMessage(content=cached_answer)
+
+    model = ChatOpenAI(model="gpt-4o-mini")
+    prompt, documents = build_rag_prompt(
+        query_text, chat_history, session_data, fetch_context
+    )
+
+    response_text = model.invoke(prompt)
+    if use_cache:
+        store_answer(response_text.content)
+
+    formatted_response = (
+        f"Response: {response_text}\nSources: {format_sources(documents)}"
+    )
+
+    print(formatted_response)
+    return response_text
 
 
 def query_rag(
@@ -75,74 +198,57 @@ def query_rag(
     fetch_context: bool,
     chroma_db,
     route: str,
+    use_cache: bool = SEMANTIC_CACHE_ENABLED,
 ):
     try:
-        model = ChatOpenAI(model="gpt-4o-mini")
-        # print("session_data: ", session_data)
-        if fetch_context:
-            chroma_db = setup_chroma_db()
-            # If context is required, proceed with fetching context from the DB
-            results = chroma_db.similarity_search_with_score(query_text, k=5)
-            context_text = "\n\n---\n\n".join(
-                [doc.page_content for doc, _score in results]
-            )
-
-            # Print the context for debugging
-            print("Context being added to the prompt:")
-            print(context_text)
-        else:
-            # No context neededn
-            context_text = ""
-
-        prompt_template = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
-
-        # print("app_type", session_data["app_type"])
-        # print("sensitive_data", session_data["sensitive_data"])
-        # print("internet_facing", session_data["internet_facing"])
-        # print("authentication", session_data["authentication"])
-        # # print("image_analysis_content", session_data["image_analysis_content"])
-        # print("attack_tree", session_data["attack_tree"])
-        # # print("threat_model", session_data["threat_model"])
-        # print("mitigations", session_data["mitigations"])
-        # print("dread_assessment", session_data["dread_assessment"])
-        # print("test_cases", session_data["test_cases"])
-
-        prompt = prompt_template.format(
-            app_type=session_data["app_type"],
-            sensitive_data=session_data["sensitive_data"],
-            internet_facing=session_data["internet_facing"],
-            authentication=session_data["authentication"],
-            image_analysis_content=session_data["image_analysis_content"],
-            attack_tree=session_data["attack_tree"],
-            threat_model=session_data["threat_model"],
-            mitigations=session_data["mitigations"],
-            dread_assessment=session_data["dread_assessment"],
-            test_cases=session_data["test_cases"],
-            # context=context_text,
-            question=query_text,
-            chat_history=chat_history,
+        return answer_rag(
+            query_text, chat_history, session_data, fetch_context, use_cache
         )
+    except Exception as e:
+        message = describe_error(e)
+        print(message)
+        return AIMessage(content=message)
 
-        response_text = model.invoke(prompt)
-
-        if fetch_context:
-            sources = [doc.metadata.get("id", None) for doc, _score in results]
-            formatted_response = f"Response: {response_text}\nSources: {sources}"
-        else:
-            formatted_response = f"Response: {response_text}\nSources: None"
 
-        print(formatted_response)
-        return response_text
+# Function to stream the answer token by token for st.write_stream
+def stream_query_rag(
+    query_text: str,
+    chat_history: str,
+    session_data: str,
+    fetch_context: bool,
+    use_cache: bool = SEMANTIC_CACHE_ENABLED,
+):
+    parts = []
+    try:
+        if use_cache:
+            cached_answer, store_answer = lookup_cached_answer(
+                query_text, session_data, fetch_context, chat_history
+            )
+            if cached_answer is not None:
+                print("Answered from the semantic cache")
+                yield cached_answer
+                return
 
-    except ValueError as e:
-        print(f"An error occurred: {e}")
-        if "AccessDeniedException" in str(e):
-            print("Access denied. Please check your credentials and model permissions.")
-        else:
-            print("An unexpected error occurred.")
+        model = ChatOpenAI(model="gpt-4o-mini")
+        prompt, documents = build_rag_prompt(
+            query_text, chat_history, session_data, fetch_context
+        )
 
+        for chunk in model.stream(prompt):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        # Shown in the chat like query_rag's error instead of crashing
+        # st.write_stream; a partial answer is never cached
+        message = describe_error(e)
+        yield f"\n\n{message}" if parts else message
+        return
+
+    # Only complete answers are cached
+    if use_cache:
+        store_answer("".join(parts))
+    print(f"Streamed response sources: {format_sources(documents)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+import threading
+import time
+
+
+# Token bucket shared by concurrent workers so their combined rate stays under
+# a per-minute limit. Callers choose the unit: the embedding pipeline acquires
+# tokens per batch, the batch threat model CLI acquires one per request.
+class TokenRateLimiter:
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = float(tokens_per_minute)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens):
+        # A single batch larger than the bucket can still go through once full
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import time
+
+from src.singleton import Singleton
+from src.sqlite_store import SQLiteCache
+
+CACHE_DIR = os.getenv("ADVERSYS_CACHE_DIR", "cache")
+RESPONSE_CACHE_PATH = os.path.join(CACHE_DIR, "responses.sqlite3")
+DEFAULT_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL", 7 * 24 * 60 * 60))
+DEFAULT_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 2000))
+
+
+# Function to build a content-addressed cache key for a generation request
+def make_cache_key(*parts):
+    payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(SQLiteCache):
+    table = "responses"
+    key_column = "key"
+    schema = (
+        """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_responses_last_access "
+        "ON responses (last_access)",
+    )
+
+    def __init__(
+        self,
+        path=RESPONSE_CACHE_PATH,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        max_entries=DEFAULT_MAX_ENTRIES,
+    ):
+        super().__init__(path, ttl_seconds, max_entries)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+
+_response_cache = Singleton(ResponseCache)
+
+
+# Function to get the response cache shared by all generators in the process
+def get_response_cache():
+    return _response_cache.get()
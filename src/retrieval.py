@@ -0,0 +1,96 @@
+import os
+import time
+
+from langchain.schema import Document
+
+from src.bm25_index import search_bm25, tokenize
+from src.db_ops import ensure_bm25_index, get_chroma_db
+
+RETRIEVAL_K = 10
+RRF_K = 60
+# The lexical reranker is cheap but opt-out for pure fusion ordering
+RERANK_ENABLED = os.getenv("RETRIEVAL_RERANK", "1") == "1"
+
+
+def _fetch_documents(chroma_db, ids):
+    if not ids:
+        return {}
+    found = chroma_db.get(ids=ids, include=["documents", "metadatas"])
+    return {
+        doc_id: Document(page_content=text, metadata=metadata or {})
+        for doc_id, text, metadata in zip(
+            found["ids"], found["documents"], found["metadatas"]
+        )
+    }
+
+
+# Function to merge ranked id lists with reciprocal-rank fusion
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+# Lightweight local reranker: boosts chunks that contain the query's terms,
+# with extra weight for exact identifiers (anything with a digit, such as a
+# CVE number or control ID) that dense retrieval tends to blur together.
+def rerank(query, scored_documents):
+    query_terms = set(tokenize(query))
+    if not query_terms:
+        return scored_documents
+    identifiers = {term for term in query_terms if any(c.isdigit() for c in term)}
+
+    def score(item):
+        doc, fused_score = item
+        doc_terms = set(tokenize(doc.page_content))
+        coverage = len(query_terms & doc_terms) / len(query_terms)
+        identifier_hits = len(identifiers & doc_terms)
+        return fused_score * (1 + coverage) + 0.1 * identifier_hits
+
+    return sorted(scored_documents, key=score, reverse=True)
+
+
+# Function to retrieve chunks with dense and BM25 search fused by RRF.
+# Returns (document, score) pairs where lower scores are better, matching
+# Chroma's distances, plus per-stage timings in milliseconds.
+def hybrid_search(query_text, k=RETRIEVAL_K, use_rerank=RERANK_ENABLED):
+    timings = {}
+    chroma_db = get_chroma_db()
+
+    start = time.perf_counter()
+    vector_results = chroma_db.similarity_search_with_score(query_text, k=k)
+    timings["vector_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    ensure_bm25_index()
+    bm25_results = search_bm25(query_text, k=k)
+    timings["bm25_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    documents = {doc.metadata.get("id"): doc for doc, _score in vector_results}
+    fused = reciprocal_rank_fusion(
+        [list(documents), [doc_id for doc_id, _score in bm25_results]]
+    )[:k]
+    missing = [doc_id for doc_id, _score in fused if doc_id not in documents]
+    documents.update(_fetch_documents(chroma_db, missing))
+    scored_documents = [
+        (documents[doc_id], fused_score)
+        for doc_id, fused_score in fused
+        if doc_id in documents
+    ]
+    timings["fusion_ms"] = (time.perf_counter() - start) * 1000
+
+    if use_rerank:
+        start = time.perf_counter()
+        scored_documents = rerank(query_text, scored_documents)
+        timings["rerank_ms"] = (time.perf_counter() - start) * 1000
+
+    print(
+        "Retrieval timings: "
+        + ", ".join(f"{stage}={ms:.1f}" for stage, ms in timings.items())
+    )
+    # Convert to rank positions so lower is better, like Chroma distances
+    results = [(doc, rank) for rank, (doc, _score) in enumerate(scored_documents)]
+    return results, timings
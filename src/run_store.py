@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+
+from src.singleton import Singleton
+from src.sqlite_store import SQLiteStore
+
+RUN_STORE_PATH = os.getenv(
+    "RUN_STORE_PATH", os.path.join("data", "threat_models.sqlite3")
+)
+DEFAULT_PAGE_SIZE = 20
+
+ARTIFACT_FIELDS = [
+    "threat_model",
+    "attack_tree",
+    "mitigations",
+    "dread_assessment",
+    "test_cases",
+]
+# Columns returned by listings; artifacts are only loaded for a single run
+SUMMARY_COLUMNS = [
+    "id",
+    "created_at",
+    "run_date",
+    "app_name",
+    "app_type",
+    "methodology",
+    "model",
+]
+
+
+# Function to derive a display name for an application from its description
+def application_name(description, max_length=80):
+    first_line = (description or "").strip().split("\n", 1)[0]
+    if len(first_line) > max_length:
+        return first_line[: max_length - 1] + "…"
+    return first_line or "Untitled application"
+
+
+# Local store of generated threat models. Each run keeps the application
+# details and every generated artifact; listings are served from B-tree
+# indexes on date, application and methodology so lookups stay logarithmic
+# as the history grows.
+class RunStore(SQLiteStore):
+    row_factory = sqlite3.Row
+    schema = (
+        f"""
+        CREATE TABLE IF NOT EXISTS runs (
+            id TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            run_date TEXT NOT NULL,
+            app_name TEXT NOT NULL,
+            app_type TEXT,
+            methodology TEXT,
+            model TEXT,
+            application TEXT NOT NULL,
+            {", ".join(f"{field} TEXT" for field in ARTIFACT_FIELDS)}
+        )
+        """,
+        *(
+            f"CREATE INDEX IF NOT EXISTS idx_runs_{column} "
+            f"ON runs ({column}, created_at)"
+            for column in ["run_date", "app_name", "methodology"]
+        ),
+    )
+
+    def __init__(self, path=RUN_STORE_PATH):
+        super().__init__(path)
+
+    def create_run(self, application, methodology=None, model=None, **artifacts):
+        run_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO runs (id, created_at, updated_at, run_date, app_name, "
+                "app_type, methodology, model, application) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    now,
+                    now,
+                    datetime.fromtimestamp(now).date().isoformat(),
+                    application_name(application.get("description")),
+                    application.get("app_type"),
+                    methodology,
+                    model,
+                    json.dumps(application, ensure_ascii=False),
+                ),
+            )
+            self._conn.commit()
+        if artifacts:
+            self.update_run(run_id, **artifacts)
+        return run_id
+
+    def update_run(self, run_id, **artifacts):
+        unknown = set(artifacts) - set(ARTIFACT_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown artifacts: {', '.join(sorted(unknown))}")
+        if not artifacts:
+            return
+        assignments = ", ".join(f"{field} = ?" for field in artifacts)
+        values = [json.dumps(value, ensure_ascii=False) for value in artifacts.values()]
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE runs SET {assignments}, updated_at = ? WHERE id = ?",
+                (*values, time.time(), run_id),
+            )
+            self._conn.commit()
+
+    def get_run(self, run_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        run = dict(row)
+        run["application"] = json.loads(run["application"])
+        for field in ARTIFACT_FIELDS:
+            if run[field] is not None:
+                run[field] = json.loads(run[field])
+        return run
+
+    # Keyset pagination: pass the created_at of the last run on the previous
+    # page as before to fetch the next one, newest first
+    def list_runs(
+        self,
+        run_date=None,
+        app_name=None,
+        methodology=None,
+        before=None,
+        limit=DEFAULT_PAGE_SIZE,
+    ):
+        conditions, params = [], []
+        for column, value in [
+            ("run_date", run_date),
+            ("app_name", app_name),
+            ("methodology", methodology),
+        ]:
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if before is not None:
+            conditions.append("created_at < ?")
+            params.append(before)
+
+        query = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM runs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_dates(self, limit=365):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_date, COUNT(*) FROM runs "
+                "GROUP BY run_date ORDER BY run_date DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [(run_date, count) for run_date, count in rows]
+
+
+_run_store = Singleton(RunStore)
+
+
+# Function to get the threat model store shared by every session
+def get_run_store():
+    return _run_store.get()
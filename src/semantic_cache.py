@@ -0,0 +1,113 @@
+import os
+import time
+
+import numpy as np
+
+from src.response_cache import CACHE_DIR, make_cache_key
+from src.singleton import Singleton
+from src.sqlite_store import SQLiteCache
+
+SEMANTIC_CACHE_PATH = os.path.join(CACHE_DIR, "semantic_answers.sqlite3")
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "1") == "1"
+SIMILARITY_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+DEFAULT_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL", 24 * 60 * 60))
+DEFAULT_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 1000))
+
+
+# Function to fingerprint the artifacts and conversation an answer was
+# grounded on, so cached answers are only reused against the same threat
+# model and documents, and a follow-up such as "expand on the second one" is
+# never answered from a different conversation
+def fingerprint_session(session_data, document_count=0, conversation=""):
+    return make_cache_key(
+        sorted((name, str(value)) for name, value in session_data.items()),
+        document_count,
+        conversation,
+    )
+
+
+def _normalise(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# Cache of Copilot answers looked up by question similarity. Questions are
+# stored with their unit-normalised embeddings, so a lookup is one dot
+# product against every entry for the same session fingerprint.
+class SemanticCache(SQLiteCache):
+    table = "answers"
+    key_column = "id"
+    schema = (
+        """
+        CREATE TABLE IF NOT EXISTS answers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fingerprint TEXT NOT NULL,
+            question TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            answer TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_answers_fingerprint ON answers (fingerprint)",
+        "CREATE INDEX IF NOT EXISTS idx_answers_last_access ON answers (last_access)",
+    )
+
+    def __init__(
+        self,
+        path=SEMANTIC_CACHE_PATH,
+        threshold=SIMILARITY_THRESHOLD,
+        ttl_seconds=DEFAULT_TTL_SECONDS,
+        max_entries=DEFAULT_MAX_ENTRIES,
+    ):
+        super().__init__(path, ttl_seconds, max_entries)
+        self.threshold = threshold
+
+    def get(self, fingerprint, vector):
+        now = time.time()
+        query = _normalise(vector)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, vector, answer FROM answers "
+                "WHERE fingerprint = ? AND created_at >= ?",
+                (fingerprint, now - self.ttl_seconds),
+            ).fetchall()
+            if not rows:
+                self.misses += 1
+                return None
+
+            matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            entry_id, _vector, answer = rows[best]
+            self._conn.execute(
+                "UPDATE answers SET last_access = ? WHERE id = ?", (now, entry_id)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return answer
+
+    def set(self, fingerprint, question, vector, answer):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO answers "
+                "(fingerprint, question, vector, answer, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, question, _normalise(vector).tobytes(), answer, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+
+_semantic_cache = Singleton(SemanticCache)
+
+
+# Function to get the answer cache shared by every Copilot session
+def get_semantic_cache():
+    return _semantic_cache.get()
@@ -0,0 +1,24 @@
+import threading
+
+
+# Object created on first use and then shared by every session in the
+# process. reset() drops it so the next get() builds a fresh one.
+class Singleton:
+    def __init__(self, factory):
+        self.factory = factory
+        self.instance = None
+        # Reentrant so callers can hold it around get() and reset()
+        self.lock = threading.RLock()
+
+    def get(self):
+        instance = self.instance
+        if instance is None:
+            with self.lock:
+                if self.instance is None:
+                    self.instance = self.factory()
+                instance = self.instance
+        return instance
+
+    def reset(self):
+        with self.lock:
+            self.instance = None
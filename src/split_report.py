@@ -0,0 +1,70 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+STATISTICS_PATH = "embedding_statistics"
+METRICS_FILE = os.path.join(STATISTICS_PATH, "split_metrics.jsonl")
+HISTOGRAM_BINS = 40
+
+# Rendering the PNG report is opt-in so uploads never wait on matplotlib
+SPLIT_REPORT_ENABLED = os.getenv("SPLIT_REPORT", "0") == "1"
+
+
+# Function to summarise split lengths in a single vectorised pass
+def compute_split_statistics(split_lengths, sources=None):
+    lengths = np.asarray(split_lengths, dtype=np.int64)
+    counts, bin_edges = np.histogram(lengths, bins=HISTOGRAM_BINS)
+    return {
+        "sources": sorted({source for source in sources or [] if source}),
+        "num_splits": int(lengths.size),
+        "min_split_length": int(lengths.min()),
+        "max_split_length": int(lengths.max()),
+        "avg_split_length": float(lengths.mean()),
+        "median_split_length": float(np.median(lengths)),
+        "p95_split_length": float(np.percentile(lengths, 95)),
+        "histogram": {
+            "counts": counts.tolist(),
+            "bin_edges": bin_edges.tolist(),
+        },
+    }
+
+
+# Function to append a statistics record to the structured metrics log
+def record_split_statistics(stats):
+    os.makedirs(STATISTICS_PATH, exist_ok=True)
+    with open(METRICS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(stats) + "\n")
+
+
+def render_split_report(stats):
+    # Imported here so matplotlib is only loaded when a report is requested
+    from matplotlib.figure import Figure
+
+    counts = stats["histogram"]["counts"]
+    bin_edges = stats["histogram"]["bin_edges"]
+
+    figure = Figure(figsize=(10, 6))
+    axes = figure.subplots()
+    axes.stairs(counts, bin_edges, fill=True)
+    axes.axvline(stats["avg_split_length"], color="g", linestyle="--", label="Mean")
+    axes.axvline(stats["p95_split_length"], color="r", linestyle="--", label="p95")
+    axes.set_xlabel("Split Length")
+    axes.set_ylabel("Count")
+    axes.set_title(f"Split Length Distribution ({stats['num_splits']} splits)")
+    axes.legend()
+
+    os.makedirs(STATISTICS_PATH, exist_ok=True)
+    figure.savefig(os.path.join(STATISTICS_PATH, "split_length_distribution.png"))
+
+
+# Function to render the report on a background thread when enabled
+def schedule_split_report(stats):
+    if not SPLIT_REPORT_ENABLED:
+        return None
+    thread = threading.Thread(
+        target=render_split_report, args=(stats,), name="split-report", daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,72 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+# Local SQLite file shared across threads. Subclasses list the statements
+# that create their tables and indexes in schema; every access to the
+# connection goes through self._lock.
+class SQLiteStore:
+    schema = ()
+    row_factory = None
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if self.row_factory is not None:
+            self._conn.row_factory = self.row_factory
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for statement in self.schema:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+
+# SQLite store whose table holds cache entries with created_at and
+# last_access columns. Entries expire after ttl_seconds and the least
+# recently used ones are dropped once there are more than max_entries.
+class SQLiteCache(SQLiteStore):
+    table = None
+    key_column = None
+
+    def __init__(self, path, ttl_seconds, max_entries):
+        super().__init__(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self):
+        # Drop expired entries, then the least recently used ones over the bound
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE created_at < ?",
+            (time.time() - self.ttl_seconds,),
+        )
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE {self.key_column} IN ("
+                f"SELECT {self.key_column} FROM {self.table} "
+                f"ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            (entries,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
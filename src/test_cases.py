@@ -1,10 +1,11 @@
-import google.generativeai as genai
-from openai import OpenAI
-from openai import AzureOpenAI
+from src.llm_client import OPENAI, generate, stream_generate
+from src.threats import format_threats_for_prompt
 
 
 # Function to create a prompt to generate mitigating controls
 def create_test_cases_prompt(threats):
+    # Compact table instead of the repr of a list of dicts
+    threats = format_threats_for_prompt(threats)
     prompt = f"""
 Act as a cyber security expert with more than 20 years experience of using the STRIDE threat modelling methodology. 
 Your task is to provide Gherkin test cases for the threats identified in a threat model. It is very important that 
@@ -30,65 +31,16 @@ YOUR RESPONSE (do not add introductory text, just provide the Gherkin test cases
 
 # Function to get test cases from the GPT response.
 def get_test_cases(api_key, model_name, prompt):
-    client = OpenAI(api_key=api_key)
-
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant that provides Gherkin test cases in Markdown format.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-
-    # Access the content directly as the response will be in text format
-    test_cases = response.choices[0].message.content
-
-    return test_cases
-
-
-# Function to get mitigations from the Azure OpenAI response.
-def get_test_cases_azure(
-    azure_api_endpoint, azure_api_key, azure_api_version, azure_deployment_name, prompt
-):
-    client = AzureOpenAI(
-        azure_endpoint=azure_api_endpoint,
-        api_key=azure_api_key,
-        api_version=azure_api_version,
-    )
-
-    response = client.chat.completions.create(
-        model=azure_deployment_name,
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant that provides Gherkin test cases in Markdown format.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-
     # Access the content directly as the response will be in text format
-    test_cases = response.choices[0].message.content
+    test_cases = generate("test_cases", prompt, OPENAI, model_name, api_key)
 
     return test_cases
 
 
-# Function to get test cases from the Google model's response.
-def get_test_cases_google(google_api_key, google_model, prompt):
-    genai.configure(api_key=google_api_key)
-    model = genai.GenerativeModel(
-        google_model,
-        system_instruction="You are a helpful assistant that provides Gherkin test cases in Markdown format.",
-    )
-    response = model.generate_content(prompt)
-
-    # Access the content directly as the response will be in text format
-    test_cases = response.candidates[0].content.parts[0].text
-
-    return test_cases
+# Function to stream test cases as Markdown chunks for st.write_stream.
+# settings holds the generate() provider arguments.
+def stream_test_cases(settings, prompt):
+    return stream_generate("test_cases", prompt, **settings)
 
 
 def main():
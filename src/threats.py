@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+
+import orjson
+
+PROMPT_HEADER = "Threat Type | Scenario | Potential Impact"
+
+
+def _clean(value):
+    # Keep each threat on a single line of the compact prompt table
+    return " ".join(str(value).split()).replace("|", "/")
+
+
+@dataclass(frozen=True, slots=True)
+class Threat:
+    threat_type: str
+    scenario: str
+    potential_impact: str = ""
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError(f"Expected a threat object, got {type(data).__name__}")
+        threat_type = data.get("Threat Type")
+        scenario = data.get("Scenario")
+        if not threat_type or not scenario:
+            raise ValueError(f"Threat is missing a type or scenario: {data}")
+        return cls(
+            str(threat_type), str(scenario), str(data.get("Potential Impact") or "")
+        )
+
+    @classmethod
+    def coerce(cls, value):
+        return value if isinstance(value, cls) else cls.from_dict(value)
+
+    # Same keys the model returns, for JSON storage and existing renderers
+    def to_dict(self):
+        return {
+            "Threat Type": self.threat_type,
+            "Scenario": self.scenario,
+            "Potential Impact": self.potential_impact,
+        }
+
+    def to_prompt_row(self):
+        return " | ".join(
+            _clean(value)
+            for value in (self.threat_type, self.scenario, self.potential_impact)
+        )
+
+
+# Parsed threat model as kept in the session. Threats are slotted, immutable
+# and stored in tuples, which is far smaller than the dicts the model returns,
+# and the model renders as a compact table when embedded in prompts instead
+# of a list of dicts that repeats every key on every threat.
+@dataclass(frozen=True, slots=True)
+class ThreatModel:
+    threats: tuple = ()
+    improvement_suggestions: tuple = ()
+
+    # Function to parse and validate the model's JSON response
+    @classmethod
+    def parse(cls, text):
+        try:
+            data = orjson.loads(text)
+        except orjson.JSONDecodeError as e:
+            raise ValueError(f"Threat model is not valid JSON: {e}") from e
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data):
+        if not isinstance(data, dict):
+            raise ValueError("Threat model response must be a JSON object")
+        threats = data.get("threat_model") or []
+        suggestions = data.get("improvement_suggestions") or []
+        # ValueError, not TypeError, so generate() treats it as a bad response
+        if not isinstance(threats, list) or not isinstance(suggestions, list):
+            raise ValueError(
+                "threat_model and improvement_suggestions must be JSON arrays"
+            )
+        return cls(
+            tuple(Threat.from_dict(threat) for threat in threats),
+            tuple(str(item) for item in suggestions),
+        )
+
+    # Accepts a ThreatModel, a list of threat dicts or Threats, or a response
+    @classmethod
+    def coerce(cls, value):
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls.from_dict(value)
+        return cls(tuple(Threat.coerce(threat) for threat in value or []))
+
+    def __iter__(self):
+        return iter(self.threats)
+
+    def __len__(self):
+        return len(self.threats)
+
+    def to_dicts(self):
+        return [threat.to_dict() for threat in self.threats]
+
+    def to_dict(self):
+        return {
+            "threat_model": self.to_dicts(),
+            "improvement_suggestions": list(self.improvement_suggestions),
+        }
+
+    def to_prompt(self):
+        rows = [PROMPT_HEADER]
+        rows.extend(threat.to_prompt_row() for threat in self.threats)
+        return "\n".join(rows)
+
+    def __str__(self):
+        return self.to_prompt()
+
+
+# Function to embed threats in a prompt. Strings are passed through as is.
+def format_threats_for_prompt(threats):
+    if isinstance(threats, str):
+        return threats
+    return ThreatModel.coerce(threats).to_prompt()
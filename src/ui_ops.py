@@ -1,15 +1,24 @@
 import streamlit as st
-from src.query_data import query_rag
+from src.semantic_cache import SEMANTIC_CACHE_ENABLED
 
 
 class UIOps:
     def __init__(self):
         self.chroma_db = None
 
-    def handle_text_submission(self, text, chat_history):
-        user_input = text
-        chat_history += f"User: {user_input}\n"
-        session_data = {
+    def has_documents(self):
+        # Deferred so the chat pages render before LangChain and Chroma load
+        from src.db_ops import count_documents
+
+        # Only pay for retrieval when there is something to retrieve
+        try:
+            return count_documents() > 0
+        except Exception as e:
+            print(f"Unable to read the document store: {e}")
+            return False
+
+    def collect_session_data(self):
+        return {
             "image_analysis_content": st.session_state["image_analysis_content"],
             "attack_tree": st.session_state["attack_tree"],
             "app_type": st.session_state["app_type2"],
@@ -22,31 +31,16 @@ class UIOps:
             "test_cases": st.session_state["test_cases"],
         }
 
-        print(
-            "FIRST SESSION DATA ------------------------------------------------------"
-        )
-        print("image_analysis_content", st.session_state["image_analysis_content"])
-        print("app_type", st.session_state["app_type2"])
-        print("sensitive_data", st.session_state["sensitive_data2"])
-        print("internet_facing", st.session_state["internet_facing2"])
-        print("authentication", st.session_state["authentication2"])
-        print("threat_model", st.session_state["threat_model"])
-        print("mitigations", st.session_state["mitigations"])
-        print("dread_assessment", st.session_state["dread_assessment"])
-        print("test_cases", st.session_state["test_cases"])
-        print(
-            "END OF FIRST SESSION DATA ------------------------------------------------------"
-        )
+    def stream_text_submission(
+        self, text, chat_history, use_cache=SEMANTIC_CACHE_ENABLED
+    ):
+        from src.query_data import stream_query_rag
 
-        result = query_rag(
-            user_input,
+        chat_history += f"User: {text}\n"
+        return stream_query_rag(
+            text,
             chat_history,
-            session_data,
-            fetch_context=False,
-            chroma_db=self.chroma_db,
-            route=None,
+            self.collect_session_data(),
+            fetch_context=self.has_documents(),
+            use_cache=use_cache,
         )
-        result = result.content
-        chat_history += f"Bot: {result}\n"
-
-        return result, chat_history
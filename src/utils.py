@@ -1,54 +1,97 @@
 # utils.py
 import json
+import sqlite3
 import uuid
 import requests
 import streamlit as st
 import streamlit.components.v1 as components
-import google.generativeai as genai
-from openai import OpenAI
-from openai import AzureOpenAI
 
-
-def parse_response(response):
-    try:
-        return json.loads(response.choices[0].message.content)
-    except json.JSONDecodeError as e:
-        print(f"JSON decoding error: {e}")
-        return None
-
-
-def get_threat_model(api_key, model_name, prompt):
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant designed to output JSON.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-    return parse_response(response)
-
-
-# Function to convert JSON to Markdown for display.
+from src.image_processing import (
+    REQUEST_TIMEOUT,
+    get_http_session,
+    hash_image,
+    preprocess_image,
+)
+from src.llm_client import (
+    AZURE,
+    AZURE_API_VERSION,
+    GOOGLE,
+    OPENAI,
+    PROVIDER_LABELS,
+    stream_generate,
+)
+from src.response_cache import get_response_cache, make_cache_key
+from src.run_store import ARTIFACT_FIELDS, get_run_store
+from src.threats import Threat, ThreatModel
+
+
+# Function to convert JSON to Markdown for display. Accepts a ThreatModel or
+# a list of threat dicts.
 def json_to_markdown(threat_model, improvement_suggestions):
-    markdown_output = "## Threat Model\n\n"
-
-    # Start the markdown table with headers
-    markdown_output += "| Threat Type | Scenario | Potential Impact |\n"
-    markdown_output += "|-------------|----------|------------------|\n"
-
-    # Fill the table rows with the threat model data
+    lines = [
+        "## Threat Model\n",
+        "| Threat Type | Scenario | Potential Impact |",
+        "|-------------|----------|------------------|",
+    ]
     for threat in threat_model:
-        markdown_output += f"| {threat['Threat Type']} | {threat['Scenario']} | {threat['Potential Impact']} |\n"
-
-    markdown_output += "\n\n## Improvement Suggestions\n\n"
-    for suggestion in improvement_suggestions:
-        markdown_output += f"- {suggestion}\n"
-
-    return markdown_output
+        if isinstance(threat, Threat):
+            threat = threat.to_dict()
+        lines.append(
+            f"| {threat['Threat Type']} | {threat['Scenario']} | {threat.get('Potential Impact', '')} |"
+        )
+    lines.append("\n\n## Improvement Suggestions\n")
+    lines.extend(f"- {suggestion}" for suggestion in improvement_suggestions)
+    return "\n".join(lines) + "\n"
+
+
+# Incremental parser that pulls complete threat objects out of a streamed
+# threat model response as soon as each object closes, so rows can be
+# rendered before the whole JSON document has arrived.
+class ThreatStreamParser:
+    # Threat objects live at depth 3: root object -> "threat_model" array -> object
+    THREAT_DEPTH = 3
+
+    def __init__(self):
+        self._chunks = []
+        self._object_chars = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def text(self):
+        return "".join(self._chunks)
+
+    def feed(self, chunk):
+        self._chunks.append(chunk)
+        threats = []
+        for ch in chunk:
+            in_object = self._depth >= self.THREAT_DEPTH
+            if in_object:
+                self._object_chars.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "{" and self._depth == self.THREAT_DEPTH:
+                    self._object_chars = [ch]
+            elif ch in "}]":
+                if ch == "}" and self._depth == self.THREAT_DEPTH:
+                    try:
+                        threats.append(json.loads("".join(self._object_chars)))
+                    except json.JSONDecodeError as e:
+                        print(f"Skipping malformed streamed threat: {e}")
+                    self._object_chars = []
+                self._depth -= 1
+        return threats
 
 
 # Function to create a prompt for generating a threat model
@@ -121,7 +164,17 @@ def create_image_analysis_prompt():
 
 
 # Function to get analyse uploaded architecture diagrams.
-def get_image_analysis(api_key, model_name, prompt, base64_image):
+def get_image_analysis(api_key, model_name, prompt, image_bytes):
+    # The same diagram analysed with the same prompt is served from the cache
+    cache = get_response_cache()
+    cache_key = make_cache_key(
+        "image_analysis", model_name, prompt, hash_image(image_bytes)
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return json.loads(cached)
+
+    base64_image, mime_type = preprocess_image(image_bytes)
     headers = {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
 
     messages = [
@@ -131,7 +184,7 @@ def get_image_analysis(api_key, model_name, prompt, base64_image):
                 {"type": "text", "text": prompt},
                 {
                     "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
+                    "image_url": {"url": f"data:{mime_type};base64,{base64_image}"},
                 },
             ],
         }
@@ -139,14 +192,18 @@ def get_image_analysis(api_key, model_name, prompt, base64_image):
 
     payload = {"model": model_name, "messages": messages, "max_tokens": 4000}
 
-    response = requests.post(
-        "https://api.openai.com/v1/chat/completions", headers=headers, json=payload
+    response = get_http_session().post(
+        "https://api.openai.com/v1/chat/completions",
+        headers=headers,
+        json=payload,
+        timeout=REQUEST_TIMEOUT,
     )
 
     # Log the response for debugging
     try:
         response.raise_for_status()  # Raise an HTTPError for bad responses
         response_content = response.json()
+        cache.set(cache_key, json.dumps(response_content))
         return response_content
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")  # HTTP error
@@ -159,74 +216,88 @@ def get_image_analysis(api_key, model_name, prompt, base64_image):
     return None
 
 
-# Function to get threat model from the GPT response.
-def get_threat_model(api_key, model_name, prompt):
-    client = OpenAI(api_key=api_key)
-
-    response = client.chat.completions.create(
-        model=model_name,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant designed to output JSON.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=4000,
-    )
-
-    # Convert the JSON string in the 'content' field to a Python dictionary
-    response_content = json.loads(response.choices[0].message.content)
-
-    return response_content
-
-
-# Function to get threat model from the Azure OpenAI response.
-def get_threat_model_azure(
-    azure_api_endpoint, azure_api_key, azure_api_version, azure_deployment_name, prompt
-):
-    client = AzureOpenAI(
-        azure_endpoint=azure_api_endpoint,
-        api_key=azure_api_key,
-        api_version=azure_api_version,
-    )
-
-    response = client.chat.completions.create(
-        model=azure_deployment_name,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant designed to output JSON.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-    )
-
-    # Convert the JSON string in the 'content' field to a Python dictionary
-    response_content = json.loads(response.choices[0].message.content)
-
-    return response_content
+# Function to collect the generate() provider arguments from the Threat Model tab
+def get_provider_settings():
+    provider = PROVIDER_LABELS.get(st.session_state.get("model_provider_tab"))
+    if provider == OPENAI:
+        return {
+            "provider": OPENAI,
+            "model": st.session_state.get("selected_model_tab"),
+            "api_key": st.session_state.get("openai_api_key_tab"),
+        }
+    if provider == AZURE:
+        return {
+            "provider": AZURE,
+            "model": st.session_state.get("azure_deployment_name_tab"),
+            "api_key": st.session_state.get("azure_api_key_tab"),
+            "endpoint": st.session_state.get("azure_api_endpoint_tab"),
+            "api_version": AZURE_API_VERSION,
+        }
+    if provider == GOOGLE:
+        return {
+            "provider": GOOGLE,
+            "model": st.session_state.get("google_model_tab"),
+            "api_key": st.session_state.get("google_api_key_tab"),
+        }
+    return None
 
 
-# Function to get threat model from the Google response.
-def get_threat_model_google(google_api_key, google_model, prompt):
-    genai.configure(api_key=google_api_key)
-    model = genai.GenerativeModel(
-        google_model, generation_config={"response_mime_type": "application/json"}
-    )
-    response = model.generate_content(prompt)
+# Function to start a stored run for the application in the Threat Model tab.
+# Artifacts generated afterwards are attached to it with record_run_artifact.
+def start_run():
+    application = {
+        "app_type": st.session_state.get("app_type2"),
+        "authentication": st.session_state.get("authentication2"),
+        "internet_facing": st.session_state.get("internet_facing2"),
+        "sensitive_data": st.session_state.get("sensitive_data2"),
+        "description": st.session_state.get("image_analysis_content"),
+    }
+    settings = get_provider_settings() or {}
+    try:
+        st.session_state["run_id"] = get_run_store().create_run(
+            application,
+            methodology=st.session_state.get("threat_model_provider_tab"),
+            model=settings.get("model"),
+        )
+    except sqlite3.Error as e:
+        print(f"Failed to save threat model run: {e}")
+        st.session_state["run_id"] = None
+
+
+def record_run_artifact(name, value):
+    run_id = st.session_state.get("run_id")
+    if not run_id:
+        return
     try:
-        # Access the JSON content from the 'parts' attribute of the 'content' object
-        response_content = json.loads(response.candidates[0].content.parts[0].text)
-    except json.JSONDecodeError as e:
-        print(f"Error decoding JSON: {str(e)}")
-        print("Raw JSON string:")
-        print(response.candidates[0].content.parts[0].text)
-        return None
-
-    return response_content
+        get_run_store().update_run(run_id, **{name: value})
+    except sqlite3.Error as e:
+        print(f"Failed to save {name} for run {run_id}: {e}")
+
+
+# Function to load a stored run into the session so the Copilot and the
+# other tabs work from it
+def load_run_into_session(run_id):
+    run = get_run_store().get_run(run_id)
+    if run is None:
+        return False
+    application = run["application"]
+    st.session_state["app_type2"] = application.get("app_type") or ""
+    st.session_state["authentication2"] = application.get("authentication") or ""
+    st.session_state["internet_facing2"] = application.get("internet_facing") or ""
+    st.session_state["sensitive_data2"] = application.get("sensitive_data") or ""
+    st.session_state["image_analysis_content"] = application.get("description") or ""
+    for field in ARTIFACT_FIELDS:
+        st.session_state[field] = run[field] or ""
+    if run["threat_model"]:
+        st.session_state["threat_model"] = ThreatModel.coerce(run["threat_model"])
+    st.session_state["run_id"] = run_id
+    return True
+
+
+# Function to stream the raw threat model JSON text. Feed the chunks to a
+# ThreatStreamParser to render threats as they arrive.
+def stream_threat_model(settings, prompt):
+    return stream_generate("threat_model", prompt, **settings, max_tokens=4000)
 
 
 def update_st_session_data():
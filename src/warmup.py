@@ -0,0 +1,147 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+# Warm-up is on by default in the container; WARMUP=0 skips it and the
+# replica reports ready as soon as Streamlit is listening
+WARMUP_ENABLED = os.getenv("WARMUP", "1") == "1"
+# Attempts per step before the replica is reported as failed
+WARMUP_ATTEMPTS = int(os.getenv("WARMUP_ATTEMPTS", 3))
+WARMUP_RETRY_DELAY = float(os.getenv("WARMUP_RETRY_DELAY", 5))
+
+STARTING = "starting"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+# Returned by a step that does not apply, e.g. because the credentials it
+# needs are entered in the UI rather than set in the environment
+SKIPPED = "skipped"
+
+# Modules whose import dominates the first request on each page
+WARMUP_MODULES = [
+    "src.db_ops",
+    "src.query_data",
+    "ui.tabs.threat_model_tab",
+    "ui.tabs.attack_tree_tab",
+    "ui.tabs.mitigations_tab",
+    "ui.tabs.dread_tab",
+    "ui.tabs.test_cases_tab",
+    "ui.tabs.copilot_tab",
+    "ui.tabs.rfps_tab",
+]
+
+_state = {"status": STARTING, "steps": {}, "error": None}
+_state_lock = threading.Lock()
+
+
+def _import_modules():
+    for module in WARMUP_MODULES:
+        importlib.import_module(module)
+
+
+def _open_vector_store():
+    from src.get_embedding_function import OPENAI_API_KEY
+
+    # The embedding function cannot be built without a key
+    if not OPENAI_API_KEY:
+        return SKIPPED
+
+    from src.db_ops import count_documents, ensure_bm25_index
+
+    # Opens the shared Chroma handle along with its embedding function, and
+    # backfills the BM25 index for a store ingested before it existed
+    count_documents()
+    ensure_bm25_index()
+
+
+def _load_bm25_index():
+    from src.bm25_index import get_bm25_index
+
+    get_bm25_index()
+
+
+def _build_provider_clients():
+    from src.llm_client import AZURE, AZURE_API_VERSION, OPENAI, get_client
+    from src.response_cache import get_response_cache
+    from src.semantic_cache import get_semantic_cache
+
+    get_response_cache()
+    get_semantic_cache()
+    if os.getenv("OPENAI_API_KEY"):
+        get_client(OPENAI, os.getenv("OPENAI_API_KEY"))
+    if os.getenv("AZURE_API_KEY") and os.getenv("AZURE_API_ENDPOINT"):
+        get_client(
+            AZURE,
+            os.getenv("AZURE_API_KEY"),
+            endpoint=os.getenv("AZURE_API_ENDPOINT"),
+            api_version=AZURE_API_VERSION,
+        )
+
+
+WARMUP_STEPS = [
+    ("imports", _import_modules),
+    ("vector_store", _open_vector_store),
+    ("bm25_index", _load_bm25_index),
+    ("clients", _build_provider_clients),
+]
+
+
+def _run_step(name, step):
+    for attempt in range(1, WARMUP_ATTEMPTS + 1):
+        try:
+            return step()
+        except Exception as e:
+            logging.error(
+                f"Warm-up step {name} failed (attempt {attempt}/{WARMUP_ATTEMPTS}): "
+                f"{str(e)}"
+            )
+            if attempt == WARMUP_ATTEMPTS:
+                raise
+            time.sleep(WARMUP_RETRY_DELAY * attempt)
+
+
+# Function to preload everything the first request would otherwise pay for.
+# Runs each step in order and records its duration, or "skipped" for a step
+# that does not apply. A step that still fails after WARMUP_ATTEMPTS marks
+# the replica as failed so it is never reported ready while half warm.
+def warm_up():
+    with _state_lock:
+        _state["status"] = WARMING
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+        try:
+            result = _run_step(name, step)
+        except Exception as e:
+            with _state_lock:
+                _state["status"] = FAILED
+                _state["error"] = f"{name}: {e}"
+            return False
+        if result == SKIPPED:
+            logging.info(f"Warm-up step {name} skipped")
+            with _state_lock:
+                _state["steps"][name] = SKIPPED
+            continue
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        logging.info(f"Warm-up step {name} finished in {elapsed_ms} ms")
+        with _state_lock:
+            _state["steps"][name] = elapsed_ms
+    with _state_lock:
+        _state["status"] = READY
+    return True
+
+
+def start_warm_up():
+    if not WARMUP_ENABLED:
+        with _state_lock:
+            _state["status"] = READY
+        return None
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def warmup_state():
+    with _state_lock:
+        return {**_state, "steps": dict(_state["steps"])}
@@ -0,0 +1,47 @@
+import pytest
+
+REGION = "us-east-1"
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    from services import dynamodb_service
+
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_SESSION_TOKEN", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", REGION)
+    # Resources are cached per region; start each test with a fresh one so
+    # it is created inside this test's mock
+    monkeypatch.setattr(dynamodb_service, "_resources", {})
+    # Retries would otherwise sleep with real backoff
+    monkeypatch.setattr(dynamodb_service, "_backoff", lambda attempt: None)
+    with moto.mock_aws():
+        yield boto3.client("dynamodb", region_name=REGION)
+
+
+def create_table(client, name, range_key=None):
+    key_schema = [{"AttributeName": "UID", "KeyType": "HASH"}]
+    attributes = [{"AttributeName": "UID", "AttributeType": "S"}]
+    if range_key is not None:
+        key_schema.append({"AttributeName": range_key, "KeyType": "RANGE"})
+        attributes.append({"AttributeName": range_key, "AttributeType": "N"})
+    client.create_table(
+        TableName=name,
+        KeySchema=key_schema,
+        AttributeDefinitions=attributes,
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return {"DYNAMODB_TABLE": name, "AWS_REGION": REGION}
+
+
+@pytest.fixture
+def config(aws):
+    return create_table(aws, "uids")
+
+
+@pytest.fixture
+def events_config(aws):
+    return create_table(aws, "events", range_key="Seq")
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("moto")
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from services import async_dynamodb_service, dynamodb_service  # noqa: E402
+from services.async_dynamodb_service import AsyncDynamoDBService  # noqa: E402
+from services.dynamodb_service import DynamoDBService  # noqa: E402
+
+OVERSIZED = "x" * 500_000
+
+
+@pytest.fixture
+def service(config):
+    # A long interval keeps the flusher out of the way unless a test flushes
+    service = AsyncDynamoDBService(config, flush_interval=60)
+    yield service
+    service.close()
+
+
+def stored_uids(config):
+    return sorted(item["UID"] for item in DynamoDBService(config).scan())
+
+
+def test_writes_are_buffered_until_flushed(config, service):
+    service.put_item_nowait({"UID": "a", "score": 1})
+    asyncio.run(service.add_uid("b"))
+
+    assert stored_uids(config) == []
+
+    service.flush()
+
+    assert stored_uids(config) == ["a", "b"]
+
+
+def test_later_write_to_the_same_item_wins(config, service):
+    service.put_item_nowait({"UID": "a", "score": 1})
+    service.put_item_nowait({"UID": "a", "score": 2})
+    service.flush()
+
+    assert DynamoDBService(config).get_uid("a") == {"UID": "a", "score": 2}
+
+
+def test_full_batch_is_flushed_without_waiting(config, service):
+    for i in range(25):
+        service.put_item_nowait({"UID": f"user-{i:02}"})
+
+    for _ in range(100):
+        if len(stored_uids(config)) == 25:
+            break
+        asyncio.run(asyncio.sleep(0.05))
+
+    assert len(stored_uids(config)) == 25
+
+
+def test_reads_see_buffered_writes(config, service):
+    DynamoDBService(config).put_item({"UID": "gone"})
+
+    service.put_item_nowait({"UID": "a", "score": 1})
+    service.delete_item_nowait({"UID": "gone"})
+
+    assert asyncio.run(service.get_uid("a")) == {"UID": "a", "score": 1}
+    assert asyncio.run(service.get_item({"UID": "gone"})) is None
+    assert stored_uids(config) == ["gone"]
+
+
+def test_batch_get_and_update_see_buffered_writes(config, service):
+    service.put_item_nowait({"UID": "a", "score": 1})
+
+    asyncio.run(service.update_item({"UID": "a"}, "SET score = :score", {":score": 5}))
+    items = asyncio.run(service.batch_get([{"UID": "a"}]))
+
+    assert items == [{"UID": "a", "score": 5}]
+
+
+def test_close_drains_the_buffer(config):
+    service = AsyncDynamoDBService(config, flush_interval=60)
+    for i in range(60):
+        service.put_item_nowait({"UID": f"user-{i:02}"})
+
+    service.close()
+
+    assert len(stored_uids(config)) == 60
+    with pytest.raises(RuntimeError):
+        service.put_item_nowait({"UID": "late"})
+
+
+def test_rejected_write_is_dead_lettered(config):
+    service = AsyncDynamoDBService(config, flush_interval=60)
+    service.put_item_nowait({"UID": "a"})
+    service.put_item_nowait({"UID": "big", "payload": OVERSIZED})
+    service.put_item_nowait({"UID": "b"})
+
+    service.flush()
+
+    # The valid writes in the same batch still land and nothing is requeued
+    assert stored_uids(config) == ["a", "b"]
+    assert [value["UID"] for _action, value, _ in service.dead_letters] == ["big"]
+    service.close()
+    assert stored_uids(config) == ["a", "b"]
+
+
+def test_throttled_writes_are_requeued_then_dropped(config, monkeypatch):
+    service = AsyncDynamoDBService(config, flush_interval=60)
+    client = service.service.table.meta.client
+    real_batch_write_item = client.batch_write_item
+    throttled = {"UID": "hot"}
+
+    def batch_write_item(RequestItems):
+        requests = RequestItems[config["DYNAMODB_TABLE"]]
+        rest = [r for r in requests if r["PutRequest"]["Item"] != throttled]
+        if rest:
+            real_batch_write_item(RequestItems={config["DYNAMODB_TABLE"]: rest})
+        unprocessed = [r for r in requests if r not in rest]
+        return {"UnprocessedItems": {config["DYNAMODB_TABLE"]: unprocessed}}
+
+    monkeypatch.setattr(client, "batch_write_item", batch_write_item)
+    service.put_item_nowait(throttled)
+    service.put_item_nowait({"UID": "cold"})
+
+    service.flush()
+
+    assert stored_uids(config) == ["cold"]
+    assert asyncio.run(service.get_uid("hot")) == throttled
+
+    service.close()
+
+    assert [value for _action, value, _ in service.dead_letters] == [throttled]
+    assert len(service.dead_letters) == 1
+
+
+def test_write_throttled_below_the_cap_still_lands(config, monkeypatch):
+    monkeypatch.setattr(async_dynamodb_service, "MAX_REQUEUES", 2)
+    monkeypatch.setattr(dynamodb_service, "MAX_BATCH_RETRIES", 1)
+    service = AsyncDynamoDBService(config, flush_interval=60)
+    client = service.service.table.meta.client
+    real_batch_write_item = client.batch_write_item
+    errors = [
+        ClientError(
+            {"Error": {"Code": "ThrottlingException", "Message": "Slow down"}},
+            "BatchWriteItem",
+        )
+        for _ in range(2)
+    ]
+
+    def batch_write_item(RequestItems):
+        if errors:
+            raise errors.pop()
+        return real_batch_write_item(RequestItems=RequestItems)
+
+    monkeypatch.setattr(client, "batch_write_item", batch_write_item)
+    service.put_item_nowait({"UID": "a"})
+
+    service.close()
+
+    assert stored_uids(config) == ["a"]
+    assert not service.dead_letters
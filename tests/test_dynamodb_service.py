@@ -0,0 +1,217 @@
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("moto")
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from services.dynamodb_service import DynamoDBService  # noqa: E402
+
+OVERSIZED = "x" * 500_000
+
+
+def throttled(operation_name, code="ThrottlingException"):
+    return ClientError(
+        {"Error": {"Code": code, "Message": "Slow down"}}, operation_name
+    )
+
+
+def uids(items):
+    return sorted(item["UID"] for item in items)
+
+
+def test_batch_write_and_batch_get_span_several_batches(config):
+    service = DynamoDBService(config)
+    items = [{"UID": f"user-{i:03}", "score": i} for i in range(250)]
+
+    assert service.batch_write(items=items) == []
+
+    keys = [{"UID": item["UID"]} for item in items]
+    assert uids(service.batch_get(keys)) == uids(items)
+
+
+def test_batch_write_deletes_keys(config):
+    service = DynamoDBService(config)
+    service.batch_write(items=[{"UID": "a"}, {"UID": "b"}])
+
+    assert service.batch_write(delete_keys=[{"UID": "a"}]) == []
+
+    assert service.get_uid("a") is None
+    assert service.get_uid("b") == {"UID": "b"}
+
+
+def test_batch_write_resends_unprocessed_items(config, monkeypatch):
+    service = DynamoDBService(config)
+    client = service.table.meta.client
+    real_batch_write_item = client.batch_write_item
+    calls = []
+
+    def batch_write_item(RequestItems):
+        calls.append(RequestItems)
+        requests = RequestItems[config["DYNAMODB_TABLE"]]
+        if len(calls) > 1:
+            return real_batch_write_item(RequestItems=RequestItems)
+        # Accept the first half, hand the rest back as unprocessed
+        real_batch_write_item(RequestItems={config["DYNAMODB_TABLE"]: requests[:5]})
+        return {"UnprocessedItems": {config["DYNAMODB_TABLE"]: requests[5:]}}
+
+    monkeypatch.setattr(client, "batch_write_item", batch_write_item)
+    items = [{"UID": f"user-{i}"} for i in range(10)]
+
+    assert service.batch_write(items=items) == []
+
+    assert len(calls) == 2
+    assert len(calls[1][config["DYNAMODB_TABLE"]]) == 5
+    assert uids(service.scan()) == uids(items)
+
+
+def test_batch_write_retries_on_demand_throttling(config, monkeypatch):
+    service = DynamoDBService(config)
+    client = service.table.meta.client
+    real_batch_write_item = client.batch_write_item
+    errors = [
+        throttled("BatchWriteItem"),
+        throttled("BatchWriteItem", "RequestLimitExceeded"),
+    ]
+
+    def batch_write_item(RequestItems):
+        if errors:
+            raise errors.pop(0)
+        return real_batch_write_item(RequestItems=RequestItems)
+
+    monkeypatch.setattr(client, "batch_write_item", batch_write_item)
+
+    assert service.batch_write(items=[{"UID": "a"}]) == []
+    assert service.get_uid("a") == {"UID": "a"}
+
+
+def test_batch_write_returns_requests_still_throttled(config, monkeypatch):
+    service = DynamoDBService(config)
+    client = service.table.meta.client
+
+    def batch_write_item(RequestItems):
+        raise throttled("BatchWriteItem")
+
+    monkeypatch.setattr(client, "batch_write_item", batch_write_item)
+
+    unprocessed = service.batch_write(items=[{"UID": "a"}])
+
+    assert unprocessed == [{"PutRequest": {"Item": {"UID": "a"}}}]
+
+
+def test_batch_write_isolates_rejected_requests(config):
+    service = DynamoDBService(config)
+    rejected = []
+    items = [{"UID": "a"}, {"UID": "big", "payload": OVERSIZED}, {"UID": "b"}]
+
+    assert service.batch_write(items=items, rejected=rejected) == []
+
+    assert [request["PutRequest"]["Item"]["UID"] for request in rejected] == ["big"]
+    assert uids(service.scan()) == ["a", "b"]
+
+
+def test_batch_get_resends_unprocessed_keys(config, monkeypatch):
+    service = DynamoDBService(config)
+    service.batch_write(items=[{"UID": f"user-{i}"} for i in range(4)])
+    client = service.table.meta.client
+    real_batch_get_item = client.batch_get_item
+    calls = []
+
+    def batch_get_item(RequestItems):
+        calls.append(RequestItems)
+        request = RequestItems[config["DYNAMODB_TABLE"]]
+        if len(calls) > 1:
+            return real_batch_get_item(RequestItems=RequestItems)
+        response = real_batch_get_item(
+            RequestItems={
+                config["DYNAMODB_TABLE"]: {**request, "Keys": request["Keys"][:1]}
+            }
+        )
+        response["UnprocessedKeys"] = {
+            config["DYNAMODB_TABLE"]: {**request, "Keys": request["Keys"][1:]}
+        }
+        return response
+
+    monkeypatch.setattr(client, "batch_get_item", batch_get_item)
+    keys = [{"UID": f"user-{i}"} for i in range(4)]
+
+    assert uids(service.batch_get(keys)) == uids(keys)
+    assert len(calls[1][config["DYNAMODB_TABLE"]]["Keys"]) == 3
+
+
+def test_batch_get_projection(config):
+    service = DynamoDBService(config)
+    service.batch_write(items=[{"UID": "a", "name": "Alice", "secret": "s"}])
+
+    items = service.batch_get(
+        [{"UID": "a"}],
+        projection_expression="#n",
+        expression_attribute_names={"#n": "name"},
+    )
+
+    assert items == [{"name": "Alice"}]
+
+
+def test_get_item_projection(config):
+    service = DynamoDBService(config)
+    service.put_item({"UID": "a", "name": "Alice", "secret": "s"})
+
+    item = service.get_item(
+        {"UID": "a"},
+        projection_expression="UID, #n",
+        expression_attribute_names={"#n": "name"},
+    )
+
+    assert item == {"UID": "a", "name": "Alice"}
+
+
+def test_query_follows_pages(events_config):
+    service = DynamoDBService(events_config)
+    service.batch_write(
+        items=[{"UID": "a", "Seq": i} for i in range(23)] + [{"UID": "b", "Seq": 0}]
+    )
+
+    items = service.query(
+        "UID = :uid",
+        expression_attribute_values={":uid": "a"},
+        page_size=5,
+        scan_forward=False,
+    )
+
+    assert [item["Seq"] for item in items] == list(range(22, -1, -1))
+
+
+def test_query_filter_and_projection(events_config):
+    service = DynamoDBService(events_config)
+    service.batch_write(
+        items=[
+            {"UID": "a", "Seq": i, "kind": "even" if i % 2 == 0 else "odd"}
+            for i in range(10)
+        ]
+    )
+
+    items = service.query(
+        "UID = :uid",
+        filter_expression="kind = :kind",
+        projection_expression="Seq",
+        expression_attribute_values={":uid": "a", ":kind": "odd"},
+        page_size=3,
+    )
+
+    assert list(items) == [{"Seq": i} for i in range(1, 10, 2)]
+
+
+def test_scan_follows_pages_with_projection(config):
+    service = DynamoDBService(config)
+    service.batch_write(items=[{"UID": f"user-{i:02}", "score": i} for i in range(30)])
+
+    items = list(service.scan(projection_expression="UID", page_size=7))
+
+    assert uids(items) == [f"user-{i:02}" for i in range(30)]
+    assert all(set(item) == {"UID"} for item in items)
+
+
+def test_invalid_query_returns_none(config):
+    service = DynamoDBService(config)
+
+    assert service.query("UID = :uid") is None
@@ -0,0 +1,52 @@
+import streamlit as st
+
+from src.ingest_worker import DONE, FAILED, get_ingest_worker
+
+
+# Function to queue an uploaded document for background ingestion. Streamlit
+# keeps the upload across reruns, so each file is only submitted once.
+def submit_upload(uploaded_file, session_key):
+    submitted = st.session_state.setdefault(session_key, {})
+    if uploaded_file.file_id in submitted:
+        return
+
+    job = get_ingest_worker().submit_upload(uploaded_file)
+    if job is None:
+        st.error("Unsupported file type. Only PDF and CSV files are supported.")
+        return
+    submitted[uploaded_file.file_id] = job.id
+    st.info(f"Queued {uploaded_file.name} for ingestion")
+
+
+def _render_jobs(jobs):
+    for job in reversed(jobs[-10:]):
+        if job.status == FAILED:
+            st.error(f"{job.name}: failed ({job.error})")
+        elif job.status == DONE:
+            st.success(f"{job.name}: added successfully")
+        else:
+            st.progress(job.progress, text=f"{job.name}: {job.stage}")
+
+
+# Reruns on its own every few seconds so the rest of the page is not redrawn
+# while documents are being processed. Once the last job finishes, a full
+# rerun replaces it with the static panel, which stops the polling.
+@st.experimental_fragment(run_every=2)
+def _live_ingest_status(job_ids):
+    jobs = get_ingest_worker().jobs(job_ids)
+    _render_jobs(jobs)
+    if not any(job.active for job in jobs):
+        st.rerun()
+
+
+# Panel listing the ingestion jobs this session submitted under session_key
+def ingest_status_panel(session_key):
+    job_ids = list(st.session_state.get(session_key, {}).values())
+    if not job_ids:
+        return
+
+    jobs = get_ingest_worker().jobs(job_ids)
+    if any(job.active for job in jobs):
+        _live_ingest_status(job_ids)
+    else:
+        _render_jobs(jobs)
@@ -0,0 +1,73 @@
+from datetime import date, datetime
+
+import streamlit as st
+
+from src.run_store import DEFAULT_PAGE_SIZE, get_run_store
+from src.utils import load_run_into_session
+
+
+def _run_label(run):
+    created = datetime.fromtimestamp(run["created_at"]).strftime("%H:%M")
+    methodology = run["methodology"] or "Threat model"
+    return f"{created} · {run['app_name']} · {methodology}"
+
+
+# Picker for previously generated threat models. Runs are listed a page at a
+# time for the chosen date, and the selected one is loaded into the session
+# as the context for the chat.
+def saved_run_picker(key_prefix):
+    store = get_run_store()
+    dates = store.list_dates()
+    if not dates:
+        st.caption("No saved threat models yet. Generated threat models appear here.")
+        return
+
+    selected_date = st.date_input(
+        "Threat models from",
+        value=date.fromisoformat(dates[0][0]),
+        key=f"{key_prefix}_run_date",
+    )
+
+    # Stack of page cursors for the selected date; the last one is the current
+    cursors_key = f"{key_prefix}_run_cursors"
+    date_key = f"{key_prefix}_run_cursor_date"
+    if st.session_state.get(date_key) != selected_date:
+        st.session_state[date_key] = selected_date
+        st.session_state[cursors_key] = [None]
+    cursors = st.session_state[cursors_key]
+
+    runs = store.list_runs(
+        run_date=selected_date.isoformat(),
+        before=cursors[-1],
+        limit=DEFAULT_PAGE_SIZE + 1,
+    )
+    has_more = len(runs) > DEFAULT_PAGE_SIZE
+    runs = runs[:DEFAULT_PAGE_SIZE]
+    if not runs:
+        st.caption("No threat models were saved on this date.")
+        return
+
+    run_ids = [run["id"] for run in runs]
+    labels = {run["id"]: _run_label(run) for run in runs}
+    selected_run = st.selectbox(
+        "Saved threat model",
+        run_ids,
+        format_func=labels.get,
+        key=f"{key_prefix}_run_id",
+    )
+
+    col1, col2, col3 = st.columns([0.5, 0.25, 0.25])
+    with col1:
+        if st.button("Use as chat context", key=f"{key_prefix}_load_run"):
+            if load_run_into_session(selected_run):
+                st.success(f"Loaded {labels[selected_run]}")
+            else:
+                st.error("That threat model is no longer available.")
+    with col2:
+        if len(cursors) > 1 and st.button("Newer", key=f"{key_prefix}_newer_runs"):
+            cursors.pop()
+            st.rerun()
+    with col3:
+        if has_more and st.button("Older", key=f"{key_prefix}_older_runs"):
+            cursors.append(runs[-1]["created_at"])
+            st.rerun()
@@ -1,5 +1,5 @@
 import streamlit as st
-from src.utils import mermaid
+from src.utils import mermaid, record_run_artifact
 from src.attack_tree import (
     create_attack_tree_prompt,
     get_attack_tree,
@@ -67,6 +67,7 @@ def attack_tree_tab():
 
                     st.write("Attack Tree Code:")
                     st.session_state["attack_tree"] = mermaid_code
+                    record_run_artifact("attack_tree", mermaid_code)
 
                     st.code(mermaid_code)
 
@@ -1,6 +1,9 @@
 import streamlit as st
+from src.conversation_memory import ConversationMemory
+from src.semantic_cache import SEMANTIC_CACHE_ENABLED
 from src.ui_ops import UIOps
-from src.db_ops import add_data
+from ui.ingest_status import ingest_status_panel, submit_upload
+from ui.run_picker import saved_run_picker
 
 
 def copilot_tab():
@@ -10,8 +13,11 @@ def copilot_tab():
     st.subheader("Chats")
     if "history" not in st.session_state:
         st.session_state.history = []
+    if "copilot_memory" not in st.session_state:
+        st.session_state.copilot_memory = ConversationMemory()
 
     st.text("(Chat list would appear here)")
+    saved_run_picker("copilot")
     st.markdown("---")  # Add a horizontal rule for separation
 
     # Chatbox section
@@ -26,30 +32,40 @@ def copilot_tab():
     # Chat input and send button
     chat_input = st.text_input("Send a message...", key="chat_input")
     send_button = st.button("Send", key="send_button")
+    use_cache = st.checkbox(
+        "Reuse answers to similar questions",
+        value=SEMANTIC_CACHE_ENABLED,
+        key="copilot_use_cache",
+        help="Serve near-duplicate questions about the same threat model from "
+        "the answer cache instead of asking the model again.",
+    )
 
     ui_ops = UIOps()
 
     if send_button and chat_input:
-        history_text = "\n".join(
-            [f"{speaker}: {message}" for speaker, message in st.session_state.history]
-        )
-        result, updated_history = ui_ops.handle_text_submission(
-            chat_input, history_text
-        )
+        memory = st.session_state.copilot_memory
+        history_text = memory.render()
 
-        st.session_state.history.append(("User", chat_input))
-        st.session_state.history.append(("Bot", result))
-
-        # Update chat history
+        # Stream the answer into the chat history as it is generated
         with chat_history_container:
             st.markdown(f"**User**: {chat_input}")
-            st.markdown(f"**Bot**: {result}")
+            st.markdown("**Bot**:")
+            result = st.write_stream(
+                ui_ops.stream_text_submission(
+                    chat_input, history_text, use_cache=use_cache
+                )
+            )
+
+        st.session_state.history.append(("User", chat_input))
+        st.session_state.history.append(("Bot", result))
+        memory.add("User", chat_input)
+        memory.add("Bot", result)
     st.markdown("---")  # Add a horizontal rule for separation
 
     # Local Docs section
     st.subheader("Local Docs")
     uploaded_file = st.file_uploader("Add Docs")
     if uploaded_file:
-        add_data(uploaded_file)
-        st.success("Document added successfully")
-        st.text("Select a collection to make it available to the chat model")
+        submit_upload(uploaded_file, "copilot_ingest_jobs")
+    ingest_status_panel("copilot_ingest_jobs")
+    st.text("Select a collection to make it available to the chat model")
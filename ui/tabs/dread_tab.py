@@ -6,6 +6,45 @@ from src.dread import (
     get_dread_assessment_google,
     dread_json_to_markdown,
 )
+from src.utils import record_run_artifact
+
+
+# Function to show prioritisation views of the current DREAD assessment:
+# reweighted ranking, risk per STRIDE category and changes since the last one
+def dread_insights(dread_assessment, previous_assessment=None):
+    from src.dread_scoring import DREAD_CATEGORIES, DreadAssessment
+
+    with st.expander("Prioritise threats", expanded=False):
+        st.caption("Adjust how much each DREAD category counts towards the risk.")
+        columns = st.columns(len(DREAD_CATEGORIES))
+        weights = {
+            category: column.slider(
+                category, 0.0, 3.0, 1.0, 0.25, key=f"dread_weight_{category}"
+            )
+            for category, column in zip(DREAD_CATEGORIES, columns)
+        }
+        assessment = DreadAssessment.from_json(dread_assessment, weights)
+        top_n = st.number_input(
+            "Threats to show", min_value=1, value=10, key="dread_top_n"
+        )
+
+        st.markdown("**Highest risk threats**")
+        st.dataframe(
+            assessment.top(int(top_n)).drop(columns="Application"),
+            hide_index=True,
+        )
+        st.markdown("**Risk by threat category**")
+        st.dataframe(assessment.by_category(), hide_index=True)
+
+        if isinstance(previous_assessment, dict):
+            previous = DreadAssessment.from_json(previous_assessment, weights)
+            changes = assessment.compare(previous)
+            changes = changes[changes["Status"] != "unchanged"]
+            st.markdown("**Changes since the previous assessment**")
+            if changes.empty:
+                st.caption("No threats were added, removed or re-scored.")
+            else:
+                st.dataframe(changes.drop(columns="Application"), hide_index=True)
 
 
 def dread_tab():
@@ -77,8 +116,19 @@ def dread_tab():
                 file_name="dread_assessment.md",
                 mime="text/markdown",
             )
+            # Keep the last assessment so re-scored threats can be compared
+            st.session_state["previous_dread_assessment"] = st.session_state.get(
+                "dread_assessment"
+            )
             st.session_state["dread_assessment"] = dread_assessment
+            record_run_artifact("dread_assessment", dread_assessment)
         else:
             st.error(
                 "Please generate a threat model first before requesting a DREAD risk assessment."
             )
+
+    if isinstance(st.session_state.get("dread_assessment"), dict):
+        dread_insights(
+            st.session_state["dread_assessment"],
+            st.session_state.get("previous_dread_assessment"),
+        )
@@ -1,10 +1,9 @@
 import streamlit as st
 from src.mitigations import (
     create_mitigations_prompt,
-    get_mitigations,
-    get_mitigations_azure,
-    get_mitigations_google,
+    stream_mitigations,
 )
+from src.utils import get_provider_settings, record_run_artifact
 
 
 def mitigations_tab():
@@ -25,41 +24,17 @@ def mitigations_tab():
             mitigations_prompt = create_mitigations_prompt(threats_markdown)
 
             with st.spinner("Suggesting mitigations..."):
+                output = st.empty()
                 max_retries = 3
                 retry_count = 0
                 while retry_count < max_retries:
                     try:
-                        model_provider = st.session_state.get("model_provider_tab")
-                        if model_provider == "Azure OpenAI Service":
-                            azure_api_endpoint = st.session_state.get(
-                                "azure_api_endpoint_tab"
+                        with output.container():
+                            mitigations_markdown = st.write_stream(
+                                stream_mitigations(
+                                    get_provider_settings(), mitigations_prompt
+                                )
                             )
-                            azure_api_key = st.session_state.get("azure_api_key_tab")
-                            azure_api_version = "2023-12-01-preview"
-                            azure_deployment_name = st.session_state.get(
-                                "azure_deployment_name_tab"
-                            )
-                            mitigations_markdown = get_mitigations_azure(
-                                azure_api_endpoint,
-                                azure_api_key,
-                                azure_api_version,
-                                azure_deployment_name,
-                                mitigations_prompt,
-                            )
-                        elif model_provider == "OpenAI API":
-                            openai_api_key = st.session_state.get("openai_api_key_tab")
-                            selected_model = st.session_state.get("selected_model_tab")
-                            mitigations_markdown = get_mitigations(
-                                openai_api_key, selected_model, mitigations_prompt
-                            )
-                        elif model_provider == "Google AI API":
-                            google_api_key = st.session_state.get("google_api_key_tab")
-                            google_model = st.session_state.get("google_model_tab")
-                            mitigations_markdown = get_mitigations_google(
-                                google_api_key, google_model, mitigations_prompt
-                            )
-
-                        st.markdown(mitigations_markdown)
                         break
                     except Exception as e:
                         retry_count += 1
@@ -82,6 +57,7 @@ def mitigations_tab():
                 mime="text/markdown",
             )
             st.session_state["mitigations"] = mitigations_markdown
+            record_run_artifact("mitigations", mitigations_markdown)
         else:
             st.error(
                 "Please generate a threat model first before suggesting mitigations."
@@ -1,6 +1,7 @@
 import streamlit as st
+from src.conversation_memory import ConversationMemory
 from src.ui_ops import UIOps
-from src.db_ops import add_data
+from ui.ingest_status import ingest_status_panel, submit_upload
 
 
 def rfps_tab():
@@ -49,26 +50,31 @@ def rfps_tab():
             current_chat = st.session_state.rfp_history[
                 st.session_state.current_chat_index
             ]
-            history_text = "\n".join(
-                [f"{speaker}: {message}" for speaker, message in current_chat]
+            # Each chat keeps its own token-budgeted memory
+            memories = st.session_state.setdefault("rfp_memories", {})
+            memory = memories.setdefault(
+                st.session_state.current_chat_index, ConversationMemory()
             )
+            history_text = memory.render()
             ui_ops = UIOps()
-            result, updated_history = ui_ops.handle_text_submission(
-                chat_input, history_text
-            )
-
-            current_chat.append(("User", chat_input))
-            current_chat.append(("Bot", result))
 
-            # Update chat history
+            # Stream the answer into the chat history as it is generated
             with chat_history_container:
                 st.markdown(f"**User**: {chat_input}")
-                st.markdown(f"**Bot**: {result}")
+                st.markdown("**Bot**:")
+                result = st.write_stream(
+                    ui_ops.stream_text_submission(chat_input, history_text)
+                )
+
+            current_chat.append(("User", chat_input))
+            current_chat.append(("Bot", result))
+            memory.add("User", chat_input)
+            memory.add("Bot", result)
 
     with col3:
         st.subheader("Local Docs")
         uploaded_file = st.file_uploader("+ Add Docs", key="rfp_file_uploader")
         if uploaded_file:
-            add_data(uploaded_file)
-            st.success("Document added successfully")
+            submit_upload(uploaded_file, "rfp_ingest_jobs")
+        ingest_status_panel("rfp_ingest_jobs")
         st.text("Select a collection to make it available to the chat model")
@@ -1,10 +1,9 @@
 import streamlit as st
 from src.test_cases import (
     create_test_cases_prompt,
-    get_test_cases,
-    get_test_cases_azure,
-    get_test_cases_google,
+    stream_test_cases,
 )
+from src.utils import get_provider_settings, record_run_artifact
 
 
 def test_cases_tab():
@@ -26,41 +25,17 @@ def test_cases_tab():
             test_cases_prompt = create_test_cases_prompt(threats_markdown)
 
             with st.spinner("Generating test cases..."):
+                output = st.empty()
                 max_retries = 3
                 retry_count = 0
                 while retry_count < max_retries:
                     try:
-                        model_provider = st.session_state.get("model_provider_tab")
-                        if model_provider == "Azure OpenAI Service":
-                            azure_api_endpoint = st.session_state.get(
-                                "azure_api_endpoint_tab"
+                        with output.container():
+                            test_cases_markdown = st.write_stream(
+                                stream_test_cases(
+                                    get_provider_settings(), test_cases_prompt
+                                )
                             )
-                            azure_api_key = st.session_state.get("azure_api_key_tab")
-                            azure_api_version = "2023-12-01-preview"
-                            azure_deployment_name = st.session_state.get(
-                                "azure_deployment_name_tab"
-                            )
-                            test_cases_markdown = get_test_cases_azure(
-                                azure_api_endpoint,
-                                azure_api_key,
-                                azure_api_version,
-                                azure_deployment_name,
-                                test_cases_prompt,
-                            )
-                        elif model_provider == "OpenAI API":
-                            openai_api_key = st.session_state.get("openai_api_key_tab")
-                            selected_model = st.session_state.get("selected_model_tab")
-                            test_cases_markdown = get_test_cases(
-                                openai_api_key, selected_model, test_cases_prompt
-                            )
-                        elif model_provider == "Google AI API":
-                            google_api_key = st.session_state.get("google_api_key_tab")
-                            google_model = st.session_state.get("google_model_tab")
-                            test_cases_markdown = get_test_cases_google(
-                                google_api_key, google_model, test_cases_prompt
-                            )
-
-                        st.markdown(test_cases_markdown)
                         break
                     except Exception as e:
                         retry_count += 1
@@ -84,6 +59,7 @@ def test_cases_tab():
             )
 
             st.session_state["test_cases"] = test_cases_markdown
+            record_run_artifact("test_cases", test_cases_markdown)
         else:
             st.error(
                 "Please generate a threat model first before requesting test cases."
@@ -1,18 +1,24 @@
 import streamlit as st
-import base64
 from threat_models.stride import create_stride_threat_model_prompt
 from threat_models.pasta import create_pasta_prompt
 from threat_models.owasp import create_owasp_prompt
 
-from src.dread import create_dread_assessment_prompt
+from src.attack_tree import create_attack_tree_prompt
+from src.dread import create_dread_assessment_prompt, dread_json_to_markdown
+from src.pipeline import run_pipeline
 from src.utils import (
-    get_threat_model,
-    get_threat_model_azure,
-    get_threat_model_google,
+    ThreatStreamParser,
+    get_provider_settings,
     json_to_markdown,
     get_image_analysis,
     create_image_analysis_prompt,
+    mermaid,
+    record_run_artifact,
+    start_run,
+    stream_threat_model,
 )
+from src.response_cache import get_response_cache
+from src.threats import Threat, ThreatModel
 
 
 def get_input():
@@ -27,6 +33,81 @@ def get_input():
     return input_text
 
 
+def create_threat_model_prompt(
+    threat_model, app_type, authentication, internet_facing, sensitive_data, app_input
+):
+    if threat_model == "STRIDE":
+        return create_stride_threat_model_prompt(
+            app_type, authentication, internet_facing, sensitive_data, app_input
+        )
+    elif threat_model == "DREAD":
+        return create_dread_assessment_prompt(
+            app_type, authentication, internet_facing, sensitive_data, app_input
+        )
+    elif threat_model == "PASTA":
+        return create_pasta_prompt(
+            app_type, authentication, internet_facing, sensitive_data, app_input
+        )
+    elif threat_model == "OWASP":
+        return create_owasp_prompt(
+            app_type, authentication, internet_facing, sensitive_data, app_input
+        )
+
+
+def generate_everything(threat_model_prompt, attack_tree_prompt):
+    settings = get_provider_settings()
+    if settings is None:
+        st.error("Please select a model provider first.")
+        return
+
+    placeholders = {
+        name: st.empty()
+        for name in [
+            "threat_model",
+            "attack_tree",
+            "mitigations",
+            "dread_assessment",
+            "test_cases",
+        ]
+    }
+
+    start_run()
+    with st.status("Generating threat model and related artifacts...") as status:
+        for name, result, error in run_pipeline(
+            settings, threat_model_prompt, attack_tree_prompt
+        ):
+            if error is not None:
+                st.error(f"Error generating {name.replace('_', ' ')}: {error}")
+                continue
+
+            st.write(f"Finished {name.replace('_', ' ')}")
+            record_run_artifact(
+                name, result.get("threat_model", []) if name == "threat_model" else result
+            )
+            with placeholders[name].container():
+                if name == "threat_model":
+                    st.session_state["threat_model"] = ThreatModel.from_dict(result)
+                    st.markdown(
+                        json_to_markdown(
+                            st.session_state["threat_model"],
+                            result.get("improvement_suggestions", []),
+                        )
+                    )
+                elif name == "attack_tree":
+                    st.session_state["attack_tree"] = result
+                    with st.expander("Attack Tree", expanded=False):
+                        mermaid(result)
+                elif name == "dread_assessment":
+                    st.session_state["dread_assessment"] = result
+                    with st.expander("DREAD Risk Assessment", expanded=False):
+                        st.markdown(dread_json_to_markdown(result))
+                else:
+                    st.session_state[name] = result
+                    with st.expander(name.replace("_", " ").title(), expanded=False):
+                        st.markdown(result)
+        status.update(label="Generation complete", state="complete")
+
+
 def threat_model_tab():
     st.header("Threat Model")
     st.markdown(
@@ -51,7 +132,8 @@ def threat_model_tab():
         help="Select the model provider you would like to use. This will determine the models available for selection.",
     )
 
-    # Add input fields for API keys and model selection based on the provider
+    # Add input fields for API keys and model selection based on the provider.
+    # Generation reads them back by key through get_provider_settings().
     if model_provider == "OpenAI API":
         openai_api_key = st.text_input(
             "Enter your OpenAI API key:", type="password", key="openai_api_key_tab"
@@ -62,21 +144,14 @@ def threat_model_tab():
             key="selected_model_tab",
         )
     elif model_provider == "Azure OpenAI Service":
-        azure_api_key = st.text_input(
-            "Azure OpenAI API key:", type="password", key="azure_api_key_tab"
-        )
-        azure_api_endpoint = st.text_input(
-            "Azure OpenAI endpoint:", key="azure_api_endpoint_tab"
-        )
-        azure_deployment_name = st.text_input(
-            "Deployment name:", key="azure_deployment_name_tab"
-        )
-        azure_api_version = "2023-12-01-preview"
+        st.text_input("Azure OpenAI API key:", type="password", key="azure_api_key_tab")
+        st.text_input("Azure OpenAI endpoint:", key="azure_api_endpoint_tab")
+        st.text_input("Deployment name:", key="azure_deployment_name_tab")
     elif model_provider == "Google AI API":
-        google_api_key = st.text_input(
+        st.text_input(
             "Enter your Google AI API key:", type="password", key="google_api_key_tab"
         )
-        google_model = st.selectbox(
+        st.selectbox(
             "Select the model:", ["gemini-1.5-pro-latest"], key="google_model_tab"
         )
 
@@ -100,16 +175,14 @@ def threat_model_tab():
                     ):
                         st.session_state.uploaded_file = uploaded_file
                         with st.spinner("Analysing the uploaded image..."):
-                            base64_image = base64.b64encode(
-                                uploaded_file.read()
-                            ).decode("utf-8")
+                            image_bytes = uploaded_file.getvalue()
                             image_analysis_prompt = create_image_analysis_prompt()
                             try:
                                 image_analysis_output = get_image_analysis(
                                     openai_api_key,
                                     selected_model,
                                     image_analysis_prompt,
-                                    base64_image,
+                                    image_bytes,
                                 )
                                 if (
                                     image_analysis_output
@@ -188,72 +261,52 @@ def threat_model_tab():
     with col1:
         threat_model_submit_button = st.button(label="Generate Threat Model")
 
+    with col2:
+        generate_everything_button = st.button(label="Generate Everything")
+
     with col3:
         save_report = st.button(label="Save Report")
 
     if threat_model_submit_button and st.session_state.get("image_analysis_content"):
         image_analysis_content = st.session_state["image_analysis_content"]
-        if threat_model == "STRIDE":
-            threat_model_prompt = create_stride_threat_model_prompt(
-                app_type,
-                authentication,
-                internet_facing,
-                sensitive_data,
-                image_analysis_content,
-            )
-        elif threat_model == "DREAD":
-            threat_model_prompt = create_dread_assessment_prompt(
-                app_type,
-                authentication,
-                internet_facing,
-                sensitive_data,
-                image_analysis_content,
-            )
-        elif threat_model == "PASTA":
-            threat_model_prompt = create_pasta_prompt(
-                app_type,
-                authentication,
-                internet_facing,
-                sensitive_data,
-                image_analysis_content,
-            )
-        elif threat_model == "OWASP":
-            threat_model_prompt = create_owasp_prompt(
-                app_type,
-                authentication,
-                internet_facing,
-                sensitive_data,
-                image_analysis_content,
-            )
+        threat_model_prompt = create_threat_model_prompt(
+            threat_model,
+            app_type,
+            authentication,
+            internet_facing,
+            sensitive_data,
+            image_analysis_content,
+        )
 
+        output = st.empty()
         with st.spinner("Analysing potential threats..."):
             max_retries = 3
             retry_count = 0
             while retry_count < max_retries:
                 try:
-                    if model_provider == "Azure OpenAI Service":
-                        model_output = get_threat_model_azure(
-                            azure_api_endpoint,
-                            azure_api_key,
-                            azure_api_version,
-                            azure_deployment_name,
-                            threat_model_prompt,
-                        )
-                    elif model_provider == "OpenAI API":
-                        model_output = get_threat_model(
-                            openai_api_key, selected_model, threat_model_prompt
-                        )
-                    elif model_provider == "Google AI API":
-                        model_output = get_threat_model_google(
-                            google_api_key, google_model, threat_model_prompt
-                        )
+                    # Render each threat row as soon as its JSON object closes
+                    parser = ThreatStreamParser()
+                    streamed_threats = []
+                    for chunk in stream_threat_model(
+                        get_provider_settings(), threat_model_prompt
+                    ):
+                        new_threats = parser.feed(chunk)
+                        if new_threats:
+                            # Validated like the final parse, so an optional
+                            # "Potential Impact" does not fail the attempt
+                            streamed_threats.extend(
+                                Threat.from_dict(threat) for threat in new_threats
+                            )
+                            output.markdown(json_to_markdown(streamed_threats, []))
 
-                    threat_model = model_output.get("threat_model", [])
-                    improvement_suggestions = model_output.get(
-                        "improvement_suggestions", []
+                    threat_model = ThreatModel.parse(parser.text)
+                    improvement_suggestions = list(
+                        threat_model.improvement_suggestions
                     )
 
                     st.session_state["threat_model"] = threat_model
+                    start_run()
+                    record_run_artifact("threat_model", threat_model.to_dicts())
                     break
                 except Exception as e:
                     retry_count += 1
@@ -269,7 +322,13 @@ def threat_model_tab():
                         )
 
         markdown_output = json_to_markdown(threat_model, improvement_suggestions)
-        st.markdown(markdown_output)
+        output.markdown(markdown_output)
+
+        cache_stats = get_response_cache().stats()
+        st.caption(
+            f"Response cache: {cache_stats['hits']} hits, "
+            f"{cache_stats['misses']} misses, {cache_stats['entries']} entries"
+        )
 
         st.download_button(
             label="Download Threat Model",
@@ -282,3 +341,26 @@ def threat_model_tab():
         "image_analysis_content"
     ):
         st.error("Please enter your application details before submitting.")
+
+    if generate_everything_button:
+        if st.session_state.get("image_analysis_content"):
+            image_analysis_content = st.session_state["image_analysis_content"]
+            generate_everything(
+                create_threat_model_prompt(
+                    threat_model,
+                    app_type,
+                    authentication,
+                    internet_facing,
+                    sensitive_data,
+                    image_analysis_content,
+                ),
+                create_attack_tree_prompt(
+                    app_type,
+                    authentication,
+                    internet_facing,
+                    sensitive_data,
+                    image_analysis_content,
+                ),
+            )
+        else:
+            st.error("Please enter your application details before submitting.")